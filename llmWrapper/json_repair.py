@@ -0,0 +1,89 @@
+import re
+import json
+from config.log_config import app_logger
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+
+    def _dumps(obj):
+        return orjson.dumps(obj).decode()
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj):
+        return json.dumps(obj, ensure_ascii=False)
+
+# Precompiled pattern for response cleanup
+_RE_CODEFENCE = re.compile(r'```json|```')
+_JSON_DECODER = json.JSONDecoder()
+
+def fix_json_format(text):
+    """
+    Fix the JSON format of the response text.
+    Handles various cases of non-standard JSON from LLM responses.
+    """
+    # Fast path: well-behaved models already return a bare JSON object
+    stripped = text.strip()
+    if stripped.startswith('{') and stripped.endswith('}'):
+        try:
+            _loads(stripped)
+            return stripped
+        except json.JSONDecodeError:
+            pass
+    
+    # Remove any markdown code block indicators
+    text = _RE_CODEFENCE.sub('', stripped).strip()
+    
+    # Check for empty or invalid responses
+    if not text:
+        app_logger.error("Model returned empty response")
+        return None
+    
+    # If only format markers, return None
+    if text in ["```json", "```"]:
+        app_logger.error("Model returned only format markers")
+        return None
+    
+    # Case 1: Multiple JSON objects concatenated - the most common issue
+    try:
+        # Try to parse as a complete JSON object first
+        _loads(text)
+        return text  # Already valid JSON
+    except json.JSONDecodeError:
+        # Not valid JSON, try to fix
+        pass
+        
+    # Try to parse multiple JSON objects on separate lines
+    try:
+        # Parse each object and merge them
+        merged_data = {}
+        for obj in _iter_json_objects(text):
+            merged_data.update(obj)
+                
+        if merged_data:
+            return _dumps(merged_data)
+        else:
+            # If nothing could be parsed, wrap the text in a JSON object with a default key
+            app_logger.warning("No JSON objects found in response, wrapping text")
+            return _dumps({"translated_text": text})
+            
+    except Exception as e:
+        app_logger.error(f"Error fixing JSON format: {e}")
+        # Last resort: wrap everything in a JSON object
+        return _dumps({"translated_text": text})
+
+def _iter_json_objects(text):
+    """
+    Yield every top-level JSON object embedded in text, scanning left to right.
+    Unlike a non-greedy regex this handles nested objects and runs in linear time.
+    """
+    i = text.find('{')
+    while i != -1:
+        try:
+            obj, end = _JSON_DECODER.raw_decode(text, i)
+            yield obj
+            i = text.find('{', end)
+        except json.JSONDecodeError:
+            i = text.find('{', i + 1)
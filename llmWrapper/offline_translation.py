@@ -1,10 +1,33 @@
 import os
 import re
+import logging
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from config.log_config import app_logger
+from llmWrapper.translation_outcome import TranslationOutcome
+from llmWrapper.json_repair import fix_json_format
 import subprocess
 import json
 import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# Precompiled patterns
+_RE_THINK = re.compile(r'<think>.*?</think>', re.DOTALL)
+_RE_LMS_PORT = re.compile(r"The server is running on port (\d+)")
+
+# Instruction appended to the user prompt for qwen3 models
+_QWEN3_SUFFIX = " /no_think IMPORTANT: Return a single valid JSON object containing all translations. Wrap everything in {}"
 
 def _get_host():
     # Get OLLAMA_HOST from environment variables or use default
@@ -26,9 +49,57 @@ def _get_host():
 # Global variables for hosts and ports
 OLLAMA_HOST, OLLAMA_PORT = _get_host()
 
+# (connect, read) timeouts: an unreachable host fails fast, slow generation still gets time
+REQUEST_TIMEOUT = (5, 120)
+
+# Retry transient gateway errors from a loaded local server. Connect and read failures
+# are not retried here so that probes of a stopped service stay fast.
+_RETRY = Retry(
+    total=2, connect=0, read=0, backoff_factor=0.2,
+    status_forcelist=(502, 503, 504), allowed_methods=None, raise_on_status=False
+)
+
+# Shared session so every local LLM call reuses a kept-alive connection
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=_RETRY))
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=_RETRY))
+
+# TTL cache for service probes and model lists: {(func_name, host, port): (timestamp, value)}
+# Only truthy results are cached, so a service that was just started is seen on the next call
+MODEL_LIST_TTL = 30
+SERVICE_STATUS_TTL = 2
+_TTL_CACHE = {}
+_TTL_CACHE_LOCK = threading.Lock()
+
+def _ttl_cache(ttl, key_func):
+    """Cache a function's truthy result for ttl seconds, keyed by key_func() (the service host and port)."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (func.__name__,) + key_func()
+            with _TTL_CACHE_LOCK:
+                cached = _TTL_CACHE.get(key)
+            if cached and time.monotonic() - cached[0] < ttl:
+                return cached[1]
+            
+            value = func(*args, **kwargs)
+            if value:
+                with _TTL_CACHE_LOCK:
+                    _TTL_CACHE[key] = (time.monotonic(), value)
+            return value
+        return wrapper
+    return decorator
+
+def invalidate_model_cache():
+    """Drop cached model lists and service status so the next call probes again."""
+    with _TTL_CACHE_LOCK:
+        _TTL_CACHE.clear()
+
 # LM Studio default settings
 LM_STUDIO_HOST = os.environ.get("LM_STUDIO_HOST", "localhost")
 LM_STUDIO_PORT = os.environ.get("LM_STUDIO_PORT", "1234")  # Initial port from env
+_LM_DETECTION_DONE = threading.Event()
+_LM_DETECTION_LOCK = threading.Lock()
 
 def _detect_lm_studio_port():
     """
@@ -51,8 +122,7 @@ def _detect_lm_studio_port():
             # Parse the output to find the port
             output = result.stderr
             
-            server_running_pattern = r"The server is running on port (\d+)"
-            match = re.search(server_running_pattern, output)
+            match = _RE_LMS_PORT.search(output)
             if match:
                 detected_port = match.group(1)
                 app_logger.info(f"LM Studio running in: {LM_STUDIO_HOST}:{detected_port}")
@@ -77,7 +147,7 @@ def _detect_lm_studio_port():
         try:
             # Try to connect to the port
             sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(1)
+            sock.settimeout(0.2)  # Localhost answers immediately, a missing daemon should not stall
             result = sock.connect_ex((LM_STUDIO_HOST, int(port)))
             sock.close()
             
@@ -85,7 +155,7 @@ def _detect_lm_studio_port():
                 # Now verify it's actually LM Studio by making an API call
                 try:
                     url = f"http://{LM_STUDIO_HOST}:{port}/v1/models"
-                    response = requests.get(url, timeout=2)
+                    response = _SESSION.get(url, timeout=2)
                     if response.status_code == 200:
                         app_logger.info(f"LM Studio detected on port {port}")
                         LM_STUDIO_PORT = port
@@ -101,46 +171,55 @@ def _detect_lm_studio_port():
         app_logger.info("LM Studio does not appear to be running")
 
 
-# Run the detection once at module initialization
-_detect_lm_studio_port()
+def _ensure_lm_studio_port():
+    """Detect the LM Studio port on first use rather than at import, and return it."""
+    if not _LM_DETECTION_DONE.is_set():
+        with _LM_DETECTION_LOCK:
+            # Another thread may have finished detection while we waited for the lock
+            if not _LM_DETECTION_DONE.is_set():
+                _detect_lm_studio_port()
+                _LM_DETECTION_DONE.set()
+    return LM_STUDIO_PORT
+
+@lru_cache(maxsize=64)
+def _parse_local_model(model):
+    """
+    Split a prefixed model name such as "(Ollama) qwen3:8b" into (service, model_name).
+    The model is fixed for a whole job, so the result is cached.
+    """
+    if model.startswith(("(Ollama)", "(LM Studio)")):
+        prefix, model_name = model.split(")", 1)
+        service = "ollama" if prefix == "(Ollama" else "lm_studio"
+        return service, model_name.strip()
+    
+    # Default to Ollama if no prefix is present
+    return "ollama", model
+
+@lru_cache(maxsize=64)
+def _is_qwen3(model_name):
+    return "qwen3" in model_name.lower()
 
 def translate_offline(messages, model):
     """
     Send messages to a local LLM service for translation.
     
     Returns:
-        tuple: (translation_result, success_status)
-            - translation_result: Translated text or error message
-            - success_status: True if API call successful, False if service unavailable
+        TranslationOutcome: ok is True if the API call succeeded, False if the
+        service is unavailable; error_kind tells whether retrying can help
     """
     try:
-        # Strip the prefix from the model name if present
-        if model.startswith("(Ollama)") or model.startswith("(LM Studio)"):
-            # Extract service type and model name
-            if "(Ollama)" in model:
-                service = "ollama"
-                model_name = model.split(")", 1)[1].strip()
-            else:  # Must be LM Studio
-                service = "lm_studio"
-                model_name = model.split(")", 1)[1].strip()
-        else:
-            # Default to Ollama if no prefix is present
-            service = "ollama"
-            model_name = model
+        service, model_name = _parse_local_model(model)
             
-        app_logger.debug(f"Using {service} model: {model_name}")
+        app_logger.debug("Using %s model: %s", service, model_name)
         
         # Special handling for qwen3 models
-        is_qwen3 = "qwen3" in model_name.lower()
-        if is_qwen3 and messages and len(messages) > 0:
+        if messages and _is_qwen3(model_name):
             last_message = messages[-1]
             if last_message.get("role") == "user" and "content" in last_message:
-                if isinstance(last_message["content"], str):
-                    # Add instruction to return valid JSON
-                    messages[-1]["content"] = (
-                        last_message["content"] + 
-                        " /no_think IMPORTANT: Return a single valid JSON object containing all translations. Wrap everything in {}"
-                    )
+                content = last_message["content"]
+                # Add instruction to return valid JSON, unless a previous call already did
+                if isinstance(content, str) and not content.endswith(_QWEN3_SUFFIX):
+                    last_message["content"] = content + _QWEN3_SUFFIX
         
         # Configure URL and payload based on service
         if service.lower() == "ollama":
@@ -159,10 +238,10 @@ def translate_offline(messages, model):
             # Check if Ollama is running
             if not is_ollama_running():
                 app_logger.error("Ollama service is not running")
-                return "Ollama service is not available", False
+                return TranslationOutcome(False, "Ollama service is not available", "transient")
                 
         elif service.lower() == "lm_studio":
-            url = f"http://{LM_STUDIO_HOST}:{LM_STUDIO_PORT}/v1/chat/completions"
+            url = f"http://{LM_STUDIO_HOST}:{_ensure_lm_studio_port()}/v1/chat/completions"
             
             payload = {
                 "model": model_name,
@@ -175,159 +254,116 @@ def translate_offline(messages, model):
             # Check if LM Studio is running
             if not is_lm_studio_running():
                 app_logger.error("LM Studio service is not running")
-                return "LM Studio service is not available", False
+                return TranslationOutcome(False, "LM Studio service is not available", "transient")
         else:
             app_logger.error(f"Unknown service: {service}")
-            return f"Unknown service: {service}", False
+            return TranslationOutcome(False, f"Unknown service: {service}", "fatal")
             
-        app_logger.debug(f"Sending request to {url} with payload: {payload}")
+        if app_logger.isEnabledFor(logging.DEBUG):
+            app_logger.debug("Sending request to %s with payload: %s", url, payload)
         
         # Make the request
-        response = requests.post(url, json=payload, timeout=120)
+        response = _SESSION.post(url, json=payload, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()  # Raise exception for HTTP errors
-        response_text = response.text
         
         # Extract the translated content based on service
-        if not response_text:
+        if not response.content:
             app_logger.warning(f"Empty response from {service}")
-            return f"Empty response from {service}", True  # API call successful but empty
+            return TranslationOutcome(True, f"Empty response from {service}")  # API call successful but empty
         
         try:
-            app_logger.debug(f"API Response: {response_text}")
-            response_json = json.loads(response_text)
+            # Only decode the body to text when it will actually be logged
+            if app_logger.isEnabledFor(logging.DEBUG):
+                app_logger.debug(f"API Response: {response.text}")
+            response_json = _loads(response.content)
             
             if service.lower() == "ollama":
                 if "message" not in response_json or "content" not in response_json["message"]:
-                    return "Invalid Ollama response format", True
+                    return TranslationOutcome(True, "Invalid Ollama response format")
                 translated_text = response_json["message"]["content"]
             elif service.lower() == "lm_studio":
                 if "choices" not in response_json or not response_json["choices"]:
-                    return "Invalid LM Studio response format", True
+                    return TranslationOutcome(True, "Invalid LM Studio response format")
                 translated_text = response_json["choices"][0]["message"]["content"]
                 
             if not translated_text:
-                return f"Empty content from {service}", True
+                return TranslationOutcome(True, f"Empty content from {service}")
                 
-            clean_translated_text = re.sub(r'<think>.*?</think>', '', translated_text, flags=re.DOTALL).strip()
+            clean_translated_text = (_RE_THINK.sub('', translated_text) if '<think>' in translated_text else translated_text).strip()
             
             # Process the text to ensure it's valid JSON
             fixed_json = fix_json_format(clean_translated_text)
             
             if fixed_json is None:
                 # Return raw text if JSON fixing failed
-                return clean_translated_text, True
+                return TranslationOutcome(True, clean_translated_text)
                 
-            return fixed_json, True
+            return TranslationOutcome(True, fixed_json)
             
         except json.JSONDecodeError as e:
             app_logger.error(f"Failed to parse JSON response: {e}")
-            return f"Invalid JSON response from {service}", True
+            return TranslationOutcome(True, f"Invalid JSON response from {service}")
         except KeyError as e:
             app_logger.error(f"Missing key in response: {e}")
-            return f"Invalid response structure from {service}", True
+            return TranslationOutcome(True, f"Invalid response structure from {service}")
         except Exception as e:
             app_logger.error(f"Response parsing failed: {e}")
-            return f"Error parsing response: {str(e)}", True
+            return TranslationOutcome(True, f"Error parsing response: {str(e)}")
 
     except requests.exceptions.ConnectionError as e:
         app_logger.error(f"Connection error: {e}")
-        return f"{service} service is not reachable", False
+        return TranslationOutcome(False, f"{service} service is not reachable", "transient")
     except requests.exceptions.Timeout as e:
         app_logger.error(f"Request timeout: {e}")
-        return f"Request to {service} timed out", False
+        return TranslationOutcome(False, f"Request to {service} timed out", "timeout")
     except requests.exceptions.HTTPError as e:
         app_logger.error(f"HTTP error: {e}")
-        status_code = e.response.status_code if e.response else "Unknown"
-        return f"HTTP {status_code} error from {service}", False
+        if e.response is None:
+            return TranslationOutcome(False, f"HTTP error from {service}", "transient")
+        status_code = e.response.status_code
+        # Client errors (bad model name, malformed request) will not fix themselves
+        error_kind = "fatal" if 400 <= status_code < 500 and status_code not in (408, 429) else "transient"
+        retry_after = e.response.headers.get("Retry-After")
+        return TranslationOutcome(
+            False, f"HTTP {status_code} error from {service}", error_kind,
+            retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None
+        )
     except requests.exceptions.RequestException as e:
         app_logger.error(f"Request error: {e}")
-        return f"Request to {service} failed: {str(e)}", False
+        return TranslationOutcome(False, f"Request to {service} failed: {str(e)}", "transient")
     except Exception as e:
         app_logger.error(f"Unexpected error: {e}")
-        return f"Unexpected error: {str(e)}", False
+        return TranslationOutcome(False, f"Unexpected error: {str(e)}", "transient")
 
-def fix_json_format(text):
+@_ttl_cache(SERVICE_STATUS_TTL, lambda: (OLLAMA_HOST, OLLAMA_PORT))
+def is_ollama_running(timeout=1):
     """
-    Fix the JSON format of the response text.
-    Handles various cases of non-standard JSON from LLM responses.
-    
-    Args:
-        text: The text to fix
-        
-    Returns:
-        A properly formatted JSON string
+    Check if Ollama service is running by querying its API on the shared session.
+    This also warms up the pooled connection used by translate_offline.
     """
-    # Remove any markdown code block indicators
-    text = re.sub(r'```json|```', '', text).strip()
-    
-    # Case 1: Multiple JSON objects concatenated - the most common issue
     try:
-        # Try to parse as a complete JSON object first
-        json.loads(text)
-        return text  # Already valid JSON
-    except json.JSONDecodeError:
-        # Not valid JSON, try to fix
-        pass
-        
-    # Try to parse multiple JSON objects on separate lines
-    try:
-        # Extract all JSON-like objects
-        objects = re.findall(r'(\{.*?\})', text, re.DOTALL)
-        
-        if not objects:
-            # Fall back to simply wrapping everything in {}
-            app_logger.warning("No JSON objects found in response, wrapping text")
-            return "{" + text.strip() + "}"
-            
-        # Parse each object and merge them
-        merged_data = {}
-        for obj_str in objects:
-            try:
-                obj = json.loads(obj_str)
-                merged_data.update(obj)
-            except json.JSONDecodeError:
-                app_logger.warning(f"Couldn't parse object: {obj_str}")
-                
-        if merged_data:
-            return json.dumps(merged_data, ensure_ascii=False)
-        else:
-            # If all parsing failed, wrap the text in a JSON object with a default key
-            app_logger.warning("Failed to parse any objects, using fallback")
-            return json.dumps({"translated_text": text}, ensure_ascii=False)
-            
-    except Exception as e:
-        app_logger.error(f"Error fixing JSON format: {e}")
-        # Last resort: wrap everything in a JSON object
-        return json.dumps({"translated_text": text}, ensure_ascii=False)
-
-def is_ollama_running(timeout=1):
-    """Check if Ollama service is running by attempting to connect to its API port."""
-    try:
-        port_int = int(OLLAMA_PORT)
-        
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(timeout)
-        result = sock.connect_ex((OLLAMA_HOST, port_int))
-        sock.close()
-        return result == 0
+        url = f"http://{OLLAMA_HOST}:{OLLAMA_PORT}/api/tags"
+        response = _SESSION.get(url, timeout=timeout)
+        return response.status_code < 500
     except Exception as e:
         app_logger.debug(f"Error checking Ollama service: {e}")
         return False
 
+@_ttl_cache(SERVICE_STATUS_TTL, lambda: (LM_STUDIO_HOST, _ensure_lm_studio_port()))
 def is_lm_studio_running(timeout=1):
-    """Check if LM Studio service is running by attempting to connect to its API port."""
+    """
+    Check if LM Studio service is running by querying its API on the shared session.
+    This also warms up the pooled connection used by translate_offline.
+    """
     try:
-        port_int = int(LM_STUDIO_PORT)
-        
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(timeout)
-        result = sock.connect_ex((LM_STUDIO_HOST, port_int))
-        sock.close()
-        return result == 0
+        url = f"http://{LM_STUDIO_HOST}:{LM_STUDIO_PORT}/v1/models"
+        response = _SESSION.get(url, timeout=timeout)
+        return response.status_code < 500
     except Exception as e:
         app_logger.debug(f"Error checking LM Studio service: {e}")
         return False
 
+@_ttl_cache(MODEL_LIST_TTL, lambda: (OLLAMA_HOST, OLLAMA_PORT))
 def get_ollama_models():
     """Get list of available Ollama models."""
     if not is_ollama_running():
@@ -336,6 +372,29 @@ def get_ollama_models():
     else:
         app_logger.info(f"Ollama running in: {OLLAMA_HOST}:{OLLAMA_PORT}")
     
+    try:
+        url = f"http://{OLLAMA_HOST}:{OLLAMA_PORT}/api/tags"
+        response = _SESSION.get(url, timeout=2)
+        response.raise_for_status()  # Raise exception for HTTP errors
+        
+        models_data = _loads(response.content)
+        model_names = []
+        
+        for model in models_data.get("models", []):
+            model_name = model.get("name")
+            if model_name:
+                # Add prefix to indicate it's an Ollama model
+                model_names.append(f"(Ollama) {model_name}")
+        
+        return model_names
+    
+    except Exception as e:
+        # Older Ollama versions may not serve /api/tags, fall back to the CLI
+        app_logger.debug(f"Could not list Ollama models via API, trying 'ollama list': {e}")
+        return _get_ollama_models_from_cli()
+
+def _get_ollama_models_from_cli():
+    """Get list of available Ollama models by parsing 'ollama list' output."""
     try:
         result = subprocess.run(
             ['ollama', 'list'], 
@@ -368,6 +427,7 @@ def get_ollama_models():
         app_logger.error(f"Unexpected error fetching Ollama models: {e}")
         return []
 
+@_ttl_cache(MODEL_LIST_TTL, lambda: (LM_STUDIO_HOST, _ensure_lm_studio_port()))
 def get_lm_studio_models():
     """Get list of available LM Studio models."""
     if not is_lm_studio_running():
@@ -375,10 +435,10 @@ def get_lm_studio_models():
     
     try:
         url = f"http://{LM_STUDIO_HOST}:{LM_STUDIO_PORT}/v1/models"
-        response = requests.get(url, timeout=5)
+        response = _SESSION.get(url, timeout=5)
         response.raise_for_status()  # Raise exception for HTTP errors
         
-        models_data = response.json()
+        models_data = _loads(response.content)
         model_names = []
         
         for model in models_data.get("data", []):
@@ -402,8 +462,12 @@ def populate_sum_model():
     Returns:
         List of model names with prefixes or None if both services are unavailable
     """
-    ollama_models = get_ollama_models()
-    lm_studio_models = get_lm_studio_models()
+    # Probe both services concurrently, they are independent and I/O-bound
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        ollama_future = executor.submit(get_ollama_models)
+        lm_studio_future = executor.submit(get_lm_studio_models)
+        ollama_models = ollama_future.result()
+        lm_studio_models = lm_studio_future.result()
     
     # Combine both lists
     combined_models = ollama_models + lm_studio_models
@@ -2,99 +2,111 @@ import re
 import logging
 import json
 import os
-from openai import OpenAI
+import atexit
+import copy
+import threading
+import httpx
+from openai import OpenAI, APITimeoutError
 from config.log_config import app_logger
+from llmWrapper.translation_outcome import TranslationOutcome
+from llmWrapper.json_repair import fix_json_format
+
+try:
+    import orjson
+
+    def _dumps(obj):
+        return orjson.dumps(obj).decode()
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj, ensure_ascii=False)
+
+# Precompiled pattern for response cleanup
+_RE_THINK = re.compile(r'<think>.*?</think>', re.DOTALL)
 
 CONFIG_DIR = "config/api_config"
 
+# Shared HTTP client so back-to-back and retried requests reuse warm keep-alive connections
+_HTTP_CLIENT = httpx.Client(
+    limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
+)
+
+# OpenAI clients keyed by (api_key, base_url), all sharing _HTTP_CLIENT
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+
+def _get_client(api_key, base_url):
+    """Return the cached OpenAI client for this key and endpoint, creating it on first use."""
+    key = (api_key, base_url)
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            client = OpenAI(api_key=api_key, base_url=base_url, http_client=_HTTP_CLIENT)
+            _CLIENTS[key] = client
+    return client
+
+def close_all():
+    """Drop cached clients and close the shared HTTP connection pool."""
+    with _CLIENTS_LOCK:
+        _CLIENTS.clear()
+    _HTTP_CLIENT.close()
+
+atexit.register(close_all)
+
+# Parsed model configs keyed by model name: {model: (mtime, config)}
+_MODEL_CONFIGS = {}
+_MODEL_CONFIGS_LOCK = threading.Lock()
+
 def load_model_config(model):
     """
     Load the JSON config for the given model name.
+    Parsed configs are cached until the file changes on disk; missing or broken configs are not
+    cached, and every caller gets its own copy.
     """
     json_path = os.path.join(CONFIG_DIR, f"{model}.json")
-    if not os.path.exists(json_path):
+    try:
+        mtime = os.stat(json_path).st_mtime_ns
+    except OSError:
         app_logger.error(f"Model config file not found: {json_path}")
         return None
 
+    with _MODEL_CONFIGS_LOCK:
+        cached = _MODEL_CONFIGS.get(model)
+    if cached and cached[0] == mtime:
+        return copy.deepcopy(cached[1])
+
     try:
         with open(json_path, "r", encoding="utf-8") as f:
             config = json.load(f)
-        return config
     except json.JSONDecodeError:
         app_logger.error(f"Failed to parse JSON file: {json_path}")
         return None
 
-def fix_json_format(text):
-    """
-    Fix the JSON format of the response text.
-    Handles various cases of non-standard JSON from LLM responses.
-    """
-    # Remove any markdown code block indicators
-    text = re.sub(r'```json|```', '', text).strip()
-    
-    # Check for empty or invalid responses
-    if not text:
-        app_logger.error("Model returned empty response")
-        return None
-    
-    # If only format markers, return None
-    if text in ["```json", "```"]:
-        app_logger.error("Model returned only format markers")
+    with _MODEL_CONFIGS_LOCK:
+        _MODEL_CONFIGS[model] = (mtime, config)
+    return copy.deepcopy(config)
+
+def _get_retry_after(error):
+    """Read the Retry-After header (in seconds) from an API error, if present."""
+    response = getattr(error, "response", None)
+    if response is None:
         return None
-    
-    # Case 1: Multiple JSON objects concatenated - the most common issue
     try:
-        # Try to parse as a complete JSON object first
-        json.loads(text)
-        return text  # Already valid JSON
-    except json.JSONDecodeError:
-        # Not valid JSON, try to fix
-        pass
-        
-    # Try to parse multiple JSON objects on separate lines
-    try:
-        # Extract all JSON-like objects
-        objects = re.findall(r'(\{.*?\})', text, re.DOTALL)
-        
-        if not objects:
-            # Fall back to simply wrapping everything in {}
-            app_logger.warning("No JSON objects found in response, wrapping text")
-            return json.dumps({"translated_text": text}, ensure_ascii=False)
-            
-        # Parse each object and merge them
-        merged_data = {}
-        for obj_str in objects:
-            try:
-                obj = json.loads(obj_str)
-                merged_data.update(obj)
-            except json.JSONDecodeError:
-                app_logger.warning(f"Couldn't parse object: {obj_str}")
-                
-        if merged_data:
-            return json.dumps(merged_data, ensure_ascii=False)
-        else:
-            # If all parsing failed, wrap the text in a JSON object with a default key
-            app_logger.warning("Failed to parse any objects, using fallback")
-            return json.dumps({"translated_text": text}, ensure_ascii=False)
-            
-    except Exception as e:
-        app_logger.error(f"Error fixing JSON format: {e}")
-        # Last resort: wrap everything in a JSON object
-        return json.dumps({"translated_text": text}, ensure_ascii=False)
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
     
 def translate_online(api_key, messages, model):
     """
     Perform translation using an online API with config from a JSON file.
     
     Returns:
-        tuple: (translation_result, success_status)
-            - translation_result: Translated text or error message
-            - success_status: True if API call successful, False if network/auth error
+        TranslationOutcome: ok is True if the API call succeeded, False on
+        network/auth errors; error_kind tells whether retrying can help
     """
     # Load model config
     model_config = load_model_config(model)
     if not model_config:
-        return "Model configuration not found", False
+        return TranslationOutcome(False, "Model configuration not found", "fatal")
         
     # Get API settings from the config
     base_url = model_config.get("base_url")
@@ -106,11 +118,11 @@ def translate_online(api_key, messages, model):
 
     if not base_url or not api_model:
         app_logger.error(f"Invalid model config: {model}")
-        return "Invalid model configuration", False
+        return TranslationOutcome(False, "Invalid model configuration", "fatal")
 
     try:
-        # Initialize API client
-        client = OpenAI(api_key=api_key, base_url=base_url)
+        # Reuse the API client for this key and endpoint
+        client = _get_client(api_key, base_url)
 
         # Prepare parameters for the API call
         params = {
@@ -130,7 +142,8 @@ def translate_online(api_key, messages, model):
             params["frequency_penalty"] = frequency_penalty
 
         # Log the messages being sent to the API
-        app_logger.debug(f"Sending messages to API: {json.dumps(messages, ensure_ascii=False, indent=2)}")
+        if app_logger.isEnabledFor(logging.DEBUG):
+            app_logger.debug("Sending messages to API: %s", _dumps(messages))
 
         # Send request
         response = client.chat.completions.create(**params)
@@ -140,48 +153,50 @@ def translate_online(api_key, messages, model):
         app_logger.error(f"API call failed: {e}")
         
         # Check for specific error types
-        if "connection" in error_msg or "network" in error_msg:
-            return f"Network error: {str(e)}", False
+        if isinstance(e, APITimeoutError):
+            return TranslationOutcome(False, f"Request timed out: {str(e)}", "timeout")
+        elif "connection" in error_msg or "network" in error_msg:
+            return TranslationOutcome(False, f"Network error: {str(e)}", "transient")
         elif "unauthorized" in error_msg or "401" in error_msg:
-            return "Authentication failed - check API key", False
+            return TranslationOutcome(False, "Authentication failed - check API key", "fatal")
         elif "insufficient" in error_msg or "quota" in error_msg:
-            return "Insufficient balance or quota exceeded", False
+            return TranslationOutcome(False, "Insufficient balance or quota exceeded", "fatal")
         elif "rate limit" in error_msg or "429" in error_msg:
-            return "Rate limit exceeded", False
+            return TranslationOutcome(False, "Rate limit exceeded", "transient", retry_after=_get_retry_after(e))
         else:
-            return f"API request failed: {str(e)}", False
+            return TranslationOutcome(False, f"API request failed: {str(e)}", "transient")
 
     try:
         if response and response.choices:
-            app_logger.debug(f"API Response: {response}")
+            app_logger.debug("API Response: %s", response)
             translated_text = response.choices[0].message.content
             
             if not translated_text:
                 app_logger.warning("Empty content in API response")
-                return "Empty response from API", True  # API call successful but empty response
+                return TranslationOutcome(True, "Empty response from API")  # API call successful but empty response
             
             # Remove unnecessary system content
-            clean_translated_text = re.sub(r'<think>.*?</think>', '', translated_text, flags=re.DOTALL).strip()
+            clean_translated_text = (_RE_THINK.sub('', translated_text) if '<think>' in translated_text else translated_text).strip()
             
             # Fix JSON format for online API responses
             fixed_json = fix_json_format(clean_translated_text)
             
             if fixed_json is None:
                 app_logger.error("Failed to parse API response format")
-                # Return the raw response with success=True since API call succeeded
-                return clean_translated_text, True
+                # Return the raw response with ok=True since API call succeeded
+                return TranslationOutcome(True, clean_translated_text)
                 
-            return fixed_json, True
+            return TranslationOutcome(True, fixed_json)
         else:
             app_logger.warning(f"Invalid response structure from {api_model}")
-            return "Invalid API response structure", True  # API call successful but bad structure
+            return TranslationOutcome(True, "Invalid API response structure")  # API call successful but bad structure
             
     except Exception as e:
         app_logger.error(f"Response parsing failed: {e}")
         # Return raw response if available, otherwise error message
         if response:
             try:
-                return str(response.choices[0].message.content), True
+                return TranslationOutcome(True, str(response.choices[0].message.content))
             except:
                 pass
-        return f"Error parsing API response: {str(e)}", True  # API call succeeded but parsing failed
\ No newline at end of file
+        return TranslationOutcome(True, f"Error parsing API response: {str(e)}")  # API call succeeded but parsing failed
\ No newline at end of file
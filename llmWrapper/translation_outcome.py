@@ -0,0 +1,27 @@
+from dataclasses import dataclass
+from typing import Literal, Optional
+
+ErrorKind = Literal["none", "transient", "fatal", "timeout"]
+
+
+@dataclass(slots=True)
+class TranslationOutcome:
+    """
+    Result of a translation request.
+
+    Attributes:
+        ok: True if the API call succeeded (the result may still be unusable)
+        result: Translated text on success, error message otherwise
+        error_kind: "none" on success, "transient" for retryable errors,
+            "fatal" for errors retrying cannot fix, "timeout" when the request
+            or the retry budget timed out
+        attempts: Number of attempts made
+        elapsed: Seconds spent including retries
+        retry_after: Delay in seconds requested by the server, if any
+    """
+    ok: bool
+    result: Optional[str] = None
+    error_kind: ErrorKind = "none"
+    attempts: int = 1
+    elapsed: float = 0.0
+    retry_after: Optional[float] = None
@@ -1,90 +1,328 @@
 import os
+import posixpath
+import zipfile
+from collections import defaultdict
+import xml.etree.ElementTree as ET
 from openpyxl import load_workbook
-from openpyxl.cell.cell import MergedCell
-from openpyxl.utils import range_boundaries
-import json
+from openpyxl.utils import coordinate_to_tuple, get_column_letter, range_boundaries
 from datetime import datetime
 from .skip_pipeline import should_translate
+from .json_io import NL_DECODE, NL_ENCODE, JsonArrayWriter, read_json
 from config.log_config import app_logger
 
+# SpreadsheetML namespaces
+_NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
 
-def extract_excel_content_to_json(file_path):
-    workbook = load_workbook(file_path)
-    cell_data = []
-    count = 0
+# Merged ranges up to this many cells are expanded into a lookup set; larger ones
+# (whole rows or columns) are checked by bounds instead
+MERGED_RANGE_CELL_LIMIT = 4096
+
+
+def _get_sheet_paths(archive):
+    """Map each sheet name to its worksheet XML path inside the xlsx archive."""
+    with archive.open("xl/_rels/workbook.xml.rels") as rels_file:
+        rels = {
+            rel.get("Id"): rel.get("Target")
+            for rel in ET.parse(rels_file).getroot().iter(f"{_NS_PKG_REL}Relationship")
+        }
+    with archive.open("xl/workbook.xml") as workbook_file:
+        sheets = list(ET.parse(workbook_file).getroot().iter(f"{_NS_MAIN}sheet"))
     
-    # Add sheet names to the extraction process
-    for sheet_name in workbook.sheetnames:
-        # Add sheet name as a special entry if it should be translated
-        if should_translate(sheet_name):
-            count += 1
-            sheet_info = {
-                "count": count,
-                "sheet": "SHEET_NAME",  # Special marker to identify sheet names
-                "row": 0,               # Use 0 to indicate it's a sheet name, not a cell
-                "column": 0,            # Use 0 to indicate it's a sheet name, not a cell
-                "value": sheet_name,
-                "is_merged": False,
-                "is_sheet_name": True   # Flag to identify this as a sheet name entry
-            }
-            cell_data.append(sheet_info)
-        
-        sheet = workbook[sheet_name]
-        merged_cells_ranges = sheet.merged_cells.ranges
+    sheet_paths = {}
+    for sheet in sheets:
+        target = rels.get(sheet.get(f"{_NS_REL}id"))
+        if not target:
+            continue
+        # Targets are normally relative to xl/, but may be absolute within the package
+        if target.startswith("/"):
+            sheet_paths[sheet.get("name")] = target.lstrip("/")
+        else:
+            sheet_paths[sheet.get("name")] = posixpath.normpath(posixpath.join("xl", target))
+    return sheet_paths
+
+def _read_merged_ranges(file_path):
+    """
+    Read merged cell ranges for every sheet directly from the xlsx XML.
+    Read-only workbooks do not expose merged_cells, so this replaces sheet.merged_cells.ranges.
+    
+    Returns:
+        dict: {sheet_name: [range string such as "A1:B2", ...]}
+    """
+    merged_ranges = {}
+    try:
+        with zipfile.ZipFile(file_path) as archive:
+            for sheet_name, sheet_path in _get_sheet_paths(archive).items():
+                ranges = []
+                with archive.open(sheet_path) as sheet_file:
+                    for _, elem in ET.iterparse(sheet_file):
+                        if elem.tag == f"{_NS_MAIN}mergeCell":
+                            ranges.append(elem.get("ref"))
+                        elem.clear()
+                merged_ranges[sheet_name] = ranges
+    except (KeyError, zipfile.BadZipFile, ET.ParseError) as e:
+        app_logger.warning(f"Could not read merged cells from {file_path}: {e}")
+    return merged_ranges
+
+
+def _apply_merged_ranges(cells, merged_ranges):
+    """
+    Flag the top-left cell of every merged range and drop the other cells a range covers.
+    Covered cells may still hold a value in the file, but openpyxl exposes them as read-only
+    MergedCell objects when the workbook is written back.
+    
+    Returns:
+        list: the remaining cell info dicts
+    """
+    if not merged_ranges:
+        return cells
+    
+    # Precompute the anchors and every covered cell once, so each cell is decided by set lookups
+    anchors = set()
+    covered = set()
+    large_bounds = []
+    for merged_range in merged_ranges:
+        min_col, min_row, max_col, max_row = range_boundaries(merged_range)
+        anchors.add((min_row, min_col))
+        if (max_row - min_row + 1) * (max_col - min_col + 1) > MERGED_RANGE_CELL_LIMIT:
+            large_bounds.append((min_col, min_row, max_col, max_row))
+            continue
+        for row in range(min_row, max_row + 1):
+            for column in range(min_col, max_col + 1):
+                covered.add((row, column))
+    covered -= anchors
+    
+    kept_cells = []
+    for cell_info in cells:
+        position = (cell_info["row"], cell_info["column"])
+        if position in anchors:
+            cell_info["is_merged"] = True
+        elif position in covered:
+            continue
+        elif large_bounds and any(
+            min_row <= position[0] <= max_row and min_col <= position[1] <= max_col
+            for min_col, min_row, max_col, max_row in large_bounds
+        ):
+            continue
+        kept_cells.append(cell_info)
+    return kept_cells
 
-        for row in sheet.iter_rows():
-            for cell in row:
-                # Skip cells with no value
-                if cell.value is None:
+def _extract_sheet_cells(sheet, sheet_name, merged_ranges):
+    """
+    Collect translatable cells of one worksheet.
+    Counts are assigned by the caller, in sheet order.
+    
+    Returns:
+        list: cell info dicts without "count"
+    """
+    cells = []
+    for row in sheet.iter_rows():
+        for cell in row:
+            value = cell.value
+            
+            # Skip cells with no value, numbers, booleans (bool is an int) and datetime objects
+            # before any str() conversion; they are kept as-is rather than translated as "True" or "1e+20"
+            if value is None or isinstance(value, (int, float, datetime)):
+                continue
+            
+            if isinstance(value, str):
+                # Skip formulas (cells that start with '=')
+                if value.strip().startswith('='):
                     continue
+                text_value = value
+            else:
+                text_value = str(value)
+            
+            # Skip cells that shouldn't be translated
+            if not should_translate(text_value):
+                continue
+                    
+            # Encode line breaks as placeholders
+            cell_value = text_value.translate(NL_ENCODE)
                 
-                # Skip datetime objects
-                if isinstance(cell.value, datetime):
-                    continue
+            cells.append({
+                "sheet": sheet_name,
+                "row": cell.row,
+                "column": cell.column,
+                "value": cell_value,
+                "is_merged": False,
+                "is_sheet_name": False  # Regular cell, not a sheet name
+            })
+    
+    # Read-only worksheets never yield MergedCell, so merged ranges are applied by position
+    return _apply_merged_ranges(cells, merged_ranges)
+
+def _read_rich_text(elem):
+    """
+    Plain text of a shared string <si> or inline string <is> element.
+    Concatenates the plain <t> and the rich text runs, ignoring phonetic runs like openpyxl does.
+    """
+    parts = []
+    for child in elem:
+        if child.tag == f"{_NS_MAIN}t":
+            parts.append(child.text or "")
+        elif child.tag == f"{_NS_MAIN}r":
+            text_elem = child.find(f"{_NS_MAIN}t")
+            if text_elem is not None:
+                parts.append(text_elem.text or "")
+    return "".join(parts)
+
+def _read_shared_strings(archive):
+    """Load the shared string table of an xlsx archive as a list indexed by string id."""
+    if "xl/sharedStrings.xml" not in archive.namelist():
+        return []
+    shared_strings = []
+    with archive.open("xl/sharedStrings.xml") as strings_file:
+        for _, elem in ET.iterparse(strings_file):
+            if elem.tag == f"{_NS_MAIN}si":
+                shared_strings.append(_read_rich_text(elem))
+                elem.clear()
+    return shared_strings
+
+def _extract_sheet_cells_xml(archive, sheet_path, sheet_name, shared_strings):
+    """
+    Collect translatable cells of one worksheet straight from its XML, without building openpyxl cells.
+    Applies the same filters as _extract_sheet_cells: formulas, numbers, booleans and dates are skipped.
+    
+    Returns:
+        list: cell info dicts without "count"
+    """
+    cell_tag = f"{_NS_MAIN}c"
+    row_tag = f"{_NS_MAIN}row"
+    value_tag = f"{_NS_MAIN}v"
+    
+    cells = []
+    merged_ranges = []
+    row_index = 0
+    column_index = 0
+    with archive.open(sheet_path) as sheet_file:
+        for event, elem in ET.iterparse(sheet_file, events=("start", "end")):
+            tag = elem.tag
+            if event == "start":
+                # Row and cell references are optional, track positions for cells without one
+                if tag == row_tag:
+                    row_index = int(elem.get("r", row_index + 1))
+                    column_index = 0
+                continue
+            
+            if tag == cell_tag:
+                ref = elem.get("r")
+                if ref:
+                    row_index, column_index = coordinate_to_tuple(ref)
+                else:
+                    column_index += 1
                 
-                # Skip formulas (cells that start with '=')
-                if isinstance(cell.value, str) and cell.value.strip().startswith('='):
-                    continue
+                cell_type = elem.get("t", "n")
+                value = None
+                # Formula cells are never translated, whatever their cached result
+                if elem.find(f"{_NS_MAIN}f") is None:
+                    if cell_type == "s":
+                        value_elem = elem.find(value_tag)
+                        if value_elem is not None and value_elem.text:
+                            value = shared_strings[int(value_elem.text)]
+                    elif cell_type == "inlineStr":
+                        inline_elem = elem.find(f"{_NS_MAIN}is")
+                        if inline_elem is not None:
+                            value = _read_rich_text(inline_elem)
+                    elif cell_type in ("str", "e"):
+                        value = elem.findtext(value_tag)
+                    # Numbers ("n"), booleans ("b") and ISO dates ("d") are skipped, as in _extract_sheet_cells
+                elem.clear()
                 
-                # Skip cells that shouldn't be translated
-                if not should_translate(str(cell.value)):
+                # Skip empty cells, formulas typed as text and cells that shouldn't be translated
+                if not value or value.strip().startswith('=') or not should_translate(value):
                     continue
                 
-                # Skip merged cells (except the top-left cell of the merge)
-                if isinstance(cell, MergedCell):
-                    continue
-                    
-                is_merged_cell = False
-                for merged_range in merged_cells_ranges:
-                    min_col, min_row, max_col, max_row = range_boundaries(str(merged_range))
-                    if cell.row == min_row and cell.column == min_col:
-                        is_merged_cell = True
-                        break
-                        
-                # Convert datetime values to string
-                cell_value = str(cell.value).replace("\n", "␊").replace("\r", "␍")
-                if isinstance(cell_value, datetime):
-                    cell_value = cell_value.isoformat()
-                    
-                count += 1
-                cell_info = {
-                    "count": count,
+                cells.append({
                     "sheet": sheet_name,
-                    "row": cell.row,
-                    "column": cell.column,
-                    "value": cell_value,
-                    "is_merged": is_merged_cell,
+                    "row": row_index,
+                    "column": column_index,
+                    # Encode line breaks as placeholders
+                    "value": value.translate(NL_ENCODE),
+                    "is_merged": False,
                     "is_sheet_name": False  # Regular cell, not a sheet name
-                }
-                cell_data.append(cell_info)
+                })
+            elif tag == row_tag:
+                elem.clear()
+            elif tag == f"{_NS_MAIN}mergeCell":
+                # Merged ranges follow the sheet data, they are applied once the sheet is read
+                merged_ranges.append(elem.get("ref"))
+    
+    return _apply_merged_ranges(cells, merged_ranges)
+
+def _extract_sheets_xml(file_path):
+    """
+    Fast path: read every sheet directly from the xlsx archive with zipfile and iterparse.
+    
+    Returns:
+        tuple: (sheet names in workbook order, {sheet_name: list of cell info dicts without "count"})
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        sheet_paths = _get_sheet_paths(archive)
+        shared_strings = _read_shared_strings(archive)
+        sheet_cells = {
+            sheet_name: _extract_sheet_cells_xml(archive, sheet_path, sheet_name, shared_strings)
+            for sheet_name, sheet_path in sheet_paths.items()
+        }
+    return list(sheet_paths), sheet_cells
+
+def _extract_sheets_openpyxl(file_path):
+    """
+    Extract every sheet through openpyxl's read-only reader.
+    
+    Returns:
+        tuple: (sheet names in workbook order, {sheet_name: list of cell info dicts without "count"})
+    """
+    # Stream cells with the read-only reader; merged ranges come from a separate XML pass
+    workbook = load_workbook(file_path, read_only=True)
+    try:
+        merged_ranges_by_sheet = _read_merged_ranges(file_path)
+        sheet_names = workbook.sheetnames
+        sheet_cells = {
+            sheet_name: _extract_sheet_cells(workbook[sheet_name], sheet_name,
+                                             merged_ranges_by_sheet.get(sheet_name, []))
+            for sheet_name in sheet_names
+        }
+    finally:
+        workbook.close()
+    return sheet_names, sheet_cells
+
+def extract_excel_content_to_json(file_path):
+    try:
+        sheet_names, sheet_cells = _extract_sheets_xml(file_path)
+    except (KeyError, ValueError, IndexError, zipfile.BadZipFile, ET.ParseError) as e:
+        # Encrypted or unusual packages: let openpyxl deal with them
+        app_logger.warning(f"Direct XML extraction failed for {file_path}, falling back to openpyxl: {e}")
+        sheet_names, sheet_cells = _extract_sheets_openpyxl(file_path)
     
     filename = os.path.splitext(os.path.basename(file_path))[0]
     temp_folder = os.path.join("temp", filename)
     os.makedirs(temp_folder, exist_ok=True)
     json_path = os.path.join(temp_folder, "src.json")
     
-    with open(json_path, "w", encoding="utf-8") as json_file:
-        json.dump(cell_data, json_file, ensure_ascii=False, indent=4)
+    # Assign counts in sheet order, streaming each entry to the JSON file instead of building the full list
+    count = 0
+    with JsonArrayWriter(json_path) as writer:
+        for sheet_name in sheet_names:
+            # Add sheet name as a special entry if it should be translated
+            if should_translate(sheet_name):
+                count += 1
+                sheet_info = {
+                    "count": count,
+                    "sheet": "SHEET_NAME",  # Special marker to identify sheet names
+                    "row": 0,               # Use 0 to indicate it's a sheet name, not a cell
+                    "column": 0,            # Use 0 to indicate it's a sheet name, not a cell
+                    "value": sheet_name,
+                    "is_merged": False,
+                    "is_sheet_name": True   # Flag to identify this as a sheet name entry
+                }
+                writer.append(sheet_info)
+            
+            # Release each sheet's cells once written
+            for cell_info in sheet_cells.pop(sheet_name):
+                count += 1
+                writer.append({"count": count, **cell_info})
 
     return json_path
 
@@ -110,65 +348,58 @@ def sanitize_sheet_name(sheet_name):
     return sanitized_name
 
 def write_translated_content_to_excel(file_path, original_json_path, translated_json_path):
-    workbook = load_workbook(file_path)
-
     # Load original JSON data
-    with open(original_json_path, "r", encoding="utf-8") as original_file:
-        original_data = json.load(original_file)
+    original_data = read_json(original_json_path)
     
     # Load translated JSON data
-    with open(translated_json_path, "r", encoding="utf-8") as translated_file:
-        translated_data = json.load(translated_file)
+    translated_data = read_json(translated_json_path)
 
     # Convert translations to a dictionary {count: translated_value}
-    translations = {str(item["count"]): item["translated"] for item in translated_data}
+    translations = {item["count"]: item["translated"] for item in translated_data}
     
-    # Track sheet name translations to apply at the end
+    # Single pass: collect sheet name translations and group translated cell contents by sheet
     sheet_name_translations = {}
-    
-    # First pass: Collect sheet name translations
+    cells_by_sheet = defaultdict(list)
     for cell_info in original_data:
-        count = str(cell_info["count"])  # Ensure count is a string
+        # Sheet names are renamed at the end, after all cells are written
         if cell_info.get("is_sheet_name", False):
-            original_sheet_name = cell_info["value"]
-            translated_sheet_name = translations.get(count)
+            translated_sheet_name = translations.get(cell_info["count"])
             if translated_sheet_name:
-                sheet_name_translations[original_sheet_name] = translated_sheet_name.replace("␊", "\n").replace("␍", "\r")
-    
-    # Second pass: Update cell contents
-    for cell_info in original_data:
-        # Skip sheet name entries as they are handled separately
-        if cell_info.get("is_sheet_name", False):
+                sheet_name_translations[cell_info["value"]] = translated_sheet_name.translate(NL_DECODE)
             continue
             
-        count = str(cell_info["count"])  # Ensure count is a string
-        sheet_name = cell_info["sheet"]
-        row = cell_info["row"]
-        column = cell_info["column"]
-        original_text = cell_info["value"]
-        is_merged = cell_info.get("is_merged", False)
+        count = cell_info["count"]
 
         # Get the translated text
         value = translations.get(count, None)
         if value is None:
             # Log missing translation with original text
             app_logger.warning(
-                f"Translation missing for count {count}. Original text: '{original_text}'"
+                f"Translation missing for count {count}. Original text: '{cell_info['value']}'"
             )
             continue
         
         # Replace line breaks to preserve format
-        value = value.replace("␊", "\n").replace("␍", "\r")
-
-        # Write to the Excel cell
+        value = value.translate(NL_DECODE)
+        cells_by_sheet[cell_info["sheet"]].append(
+            (cell_info["row"], cell_info["column"], value, cell_info.get("is_merged", False))
+        )
+    
+    # Release the JSON data before loading the workbook, so both are never held in memory at once.
+    # The full (non write-only) workbook is still needed to keep styles, charts and images intact.
+    del original_data, translated_data, translations
+    workbook = load_workbook(file_path)
+    
+    # Write to the Excel cells, resolving each sheet only once
+    for sheet_name, entries in cells_by_sheet.items():
         sheet = workbook[sheet_name]
-        cell = sheet.cell(row=row, column=column)
-        cell.value = value
+        for row, column, value, is_merged in entries:
+            sheet.cell(row=row, column=column).value = value
 
-        # Handle merged cells if applicable
-        if is_merged:
-            merge_range = f"{cell.coordinate}:{cell.coordinate}"
-            sheet.merge_cells(merge_range)
+            # Handle merged cells if applicable
+            if is_merged:
+                coordinate = f"{get_column_letter(column)}{row}"
+                sheet.merge_cells(f"{coordinate}:{coordinate}")
     
     # Final pass: Rename sheets with their translations
     for original_name, translated_name in sheet_name_translations.items():
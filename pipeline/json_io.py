@@ -0,0 +1,77 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Separators for the standard json fallback, matching orjson's compact output
+_COMPACT_SEPARATORS = (",", ":")
+
+# Line break placeholders used for text values in the pipeline JSON files, applied in a single pass with str.translate
+NL_ENCODE = str.maketrans({"\n": "␊", "\r": "␍"})
+NL_DECODE = str.maketrans({"␊": "\n", "␍": "\r"})
+
+
+def write_json(path, data):
+    """
+    Write data to a JSON file without indentation, these files are machine-consumed.
+    Uses orjson when available, falling back to the standard json module.
+    """
+    if orjson is not None:
+        with open(path, "wb") as json_file:
+            json_file.write(orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(path, "w", encoding="utf-8") as json_file:
+            json.dump(data, json_file, ensure_ascii=False, separators=_COMPACT_SEPARATORS)
+
+def read_json(path):
+    """Load a JSON file, using orjson when available."""
+    if orjson is not None:
+        with open(path, "rb") as json_file:
+            return orjson.loads(json_file.read())
+    with open(path, "r", encoding="utf-8") as json_file:
+        return json.load(json_file)
+
+class JsonArrayWriter:
+    """
+    Write a JSON array to a file one item at a time, so callers never hold the full list.
+    The file is still a regular JSON array and can be read with read_json or json.load.
+
+    Usage:
+        with JsonArrayWriter(path) as writer:
+            writer.append(item)
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._first = True
+
+    def __enter__(self):
+        if orjson is not None:
+            self._file = open(self.path, "wb")
+            self._file.write(b"[")
+        else:
+            self._file = open(self.path, "w", encoding="utf-8")
+            self._file.write("[")
+        return self
+
+    def append(self, item):
+        """Serialize one item and write it to the array."""
+        if orjson is not None:
+            if not self._first:
+                self._file.write(b",\n")
+            self._file.write(orjson.dumps(item, option=orjson.OPT_NON_STR_KEYS))
+        else:
+            if not self._first:
+                self._file.write(",\n")
+            self._file.write(json.dumps(item, ensure_ascii=False, separators=_COMPACT_SEPARATORS))
+        self._first = False
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self._file.write(b"]" if orjson is not None else "]")
+        finally:
+            self._file.close()
+        return False
@@ -1,283 +1,323 @@
-import json
 import os
 import re
+import shutil
 from bs4 import BeautifulSoup  # Import BeautifulSoup for HTML parsing
 from .skip_pipeline import should_translate
+from .json_io import JsonArrayWriter, read_json
 from config.log_config import app_logger
 
+# Precompiled HTML line patterns
+_RE_HTML_TAG_ONLY = re.compile(r'^<[^<>]*>$')  # Exactly one '<' and one '>'
+_RE_HTML_COMPLEX = re.compile(r'^<([a-zA-Z0-9]+)[^>]*>(.*)</\1>$')
+
+# Structure item types whose translation is wrapped in the original outer tags
+_HTML_WRAPPED_TYPES = frozenset(("html_simple", "html_complex"))
+
+# Write buffer size for the translated Markdown output
+OUTPUT_BUFFER_SIZE = 1024 * 1024
+
+def _save_original_copy(file_path, target_path):
+    """
+    Keep a copy of the source file without reading it into memory.
+    Hardlinks when possible, otherwise lets shutil.copyfile use the OS fast copy.
+    """
+    # Never write through a link left by a previous run, it may point at another source file
+    if os.path.lexists(target_path):
+        os.remove(target_path)
+    try:
+        os.link(file_path, target_path)
+    except OSError:
+        shutil.copyfile(file_path, target_path)
+
+def _iter_lines(file_path):
+    """
+    Yield the lines of a text file exactly like content.split('\n'), without reading the whole file.
+    """
+    with open(file_path, 'r', encoding='utf-8') as md_file:
+        line = ""
+        for line in md_file:
+            yield line[:-1] if line.endswith('\n') else line
+        # A trailing newline (or an empty file) leaves one final empty line
+        if line.endswith('\n') or not line:
+            yield ""
+
 def extract_md_content_to_json(file_path):
     """
     Extract Markdown content to JSON, handling complex HTML structures including nested tables
     Preserves line formats and document structure
     """
-    # Initialize data structures
-    content_data = []     # Content to translate
-    structure_items = []  # Complete document structure
     position_index = 0    # Position tracker
     
-    # Read file content
-    with open(file_path, 'r', encoding='utf-8') as md_file:
-        content = md_file.read()
-        
     # Save original content
     filename = os.path.splitext(os.path.basename(file_path))[0]
     temp_folder = os.path.join("temp", filename)
     os.makedirs(temp_folder, exist_ok=True)
-    with open(os.path.join(temp_folder, "original_content.md"), "w", encoding="utf-8") as original_file:
-        original_file.write(content)
-    
-    # Split content by line
-    lines = content.split('\n')
+    _save_original_copy(file_path, os.path.join(temp_folder, "original_content.md"))
     
     # Counter
     count = 0
     
-    # Code block tracker
-    in_code_block = False
+    # Locate code fences in a first streaming pass: pair opening and closing markers,
+    # an unclosed fence runs to the end
+    fence_lines = []
+    line_count = 0
+    for line_index, line in enumerate(_iter_lines(file_path)):
+        if line.lstrip().startswith('```'):
+            fence_lines.append(line_index)
+        line_count = line_index + 1
+    code_marker_lines = set(fence_lines)
+    code_content_lines = set()
+    for start, end in zip(fence_lines[0::2], fence_lines[1::2] + [line_count]):
+        code_content_lines.update(range(start + 1, end))
     
-    # Process each line
-    for line_index, line in enumerate(lines):
-        # Handle code blocks
-        if line.strip().startswith('```'):
-            in_code_block = not in_code_block
-            structure_items.append({
-                "index": position_index,
-                "type": "code_marker",
-                "value": line,
-                "translate": False
-            })
-            position_index += 1
-            continue
+    # Stream the document structure and the content to translate straight to their JSON files
+    structure_path = os.path.join(temp_folder, "structure.json")
+    json_path = os.path.join(temp_folder, "src.json")
+    with JsonArrayWriter(structure_path) as structure_writer, JsonArrayWriter(json_path) as content_writer:
+        # Process each line
+        for line_index, line in enumerate(_iter_lines(file_path)):
+            # Handle code blocks
+            if line_index in code_marker_lines:
+                structure_writer.append({
+                    "index": position_index,
+                    "type": "code_marker",
+                    "value": line,
+                    "translate": False
+                })
+                position_index += 1
+                continue
         
-        # Skip translation for code block content
-        if in_code_block:
-            structure_items.append({
-                "index": position_index,
-                "type": "code_content",
-                "value": line,
-                "translate": False
-            })
-            position_index += 1
-            continue
+            # Skip translation for code block content
+            if line_index in code_content_lines:
+                structure_writer.append({
+                    "index": position_index,
+                    "type": "code_content",
+                    "value": line,
+                    "translate": False
+                })
+                position_index += 1
+                continue
             
-        # Handle empty lines
-        if not line.strip():
-            structure_items.append({
-                "index": position_index,
-                "type": "empty_line",
-                "value": line,
-                "translate": False
-            })
-            position_index += 1
-            continue
+            stripped = line.strip()
+            
+            # Handle empty lines
+            if not stripped:
+                structure_writer.append({
+                    "index": position_index,
+                    "type": "empty_line",
+                    "value": line,
+                    "translate": False
+                })
+                position_index += 1
+                continue
             
-        # Process HTML tags
-        if line.strip().startswith('<') and '>' in line:
+            # Process HTML tags
+            if stripped.startswith('<') and '>' in line:
+                line_lower = line.lower()
             
-            # Handle complex HTML tables and other nested structures
-            if ('<html>' in line.lower() or '<table>' in line.lower()) and ('</html>' in line.lower() or '</table>' in line.lower()):
-                try:
-                    # Parse HTML using BeautifulSoup
-                    soup = BeautifulSoup(line, 'html.parser')
+                # Handle complex HTML tables and other nested structures
+                if ('<html>' in line_lower or '<table>' in line_lower) and ('</html>' in line_lower or '</table>' in line_lower):
+                    try:
+                        # Parse HTML using BeautifulSoup
+                        soup = BeautifulSoup(line, 'html.parser')
                     
-                    # Track cells that need translation
-                    translatable_cells = []
+                        # Track cells that need translation
+                        translatable_cells = []
                     
-                    # Find all table cells
-                    for i, td in enumerate(soup.find_all('td')):
-                        # Get the text content of the cell
-                        cell_text = td.get_text().strip()
+                        # Find all table cells
+                        for i, td in enumerate(soup.find_all('td')):
+                            # Get the text content of the cell
+                            cell_text = td.get_text().strip()
                         
-                        # Check if cell needs translation
-                        if cell_text and should_translate(cell_text):
-                            count += 1
-                            # Store information about translatable cell
-                            translatable_cells.append({
-                                "count": count,
-                                "index": i,
-                                "original_text": cell_text
-                            })
+                            # Check if cell needs translation
+                            if cell_text and should_translate(cell_text):
+                                count += 1
+                                # Store information about translatable cell
+                                translatable_cells.append({
+                                    "count": count,
+                                    "index": i,
+                                    "original_text": cell_text
+                                })
                             
-                            # Add to content data for translation
-                            content_data.append({
-                                "count": count,
+                                # Add to content data for translation
+                                content_writer.append({
+                                    "count": count,
+                                    "index": position_index,
+                                    "type": "html_table_cell",
+                                    "value": cell_text
+                                })
+                    
+                        # If we found any cells to translate
+                        if translatable_cells:
+                            structure_writer.append({
                                 "index": position_index,
-                                "type": "html_table_cell",
-                                "value": cell_text
+                                "type": "html_table",
+                                "value": line,
+                                "translate": True,
+                                "translatable_cells": translatable_cells
+                            })
+                        else:
+                            # No cells need translation
+                            structure_writer.append({
+                                "index": position_index,
+                                "type": "html_preserved",
+                                "value": line,
+                                "translate": False
                             })
                     
-                    # If we found any cells to translate
-                    if translatable_cells:
-                        structure_items.append({
+                        position_index += 1
+                        continue
+                    except Exception as e:
+                        # Log parsing error and fall back to default handling
+                        app_logger.error(f"Error parsing HTML table: {str(e)}")
+
+                # Handle self-closing tags
+                if _RE_HTML_TAG_ONLY.match(stripped):
+                    structure_writer.append({
+                        "index": position_index,
+                        "type": "html_tag_only",
+                        "value": line,
+                        "translate": False
+                    })
+                    position_index += 1
+                    continue
+                
+                # Handle HTML comments
+                if '<!--' in line and '-->' in line:
+                    structure_writer.append({
+                        "index": position_index,
+                        "type": "html_comment",
+                        "value": line,
+                        "translate": False
+                    })
+                    position_index += 1
+                    continue
+                
+                # Handle tag-wrapped content with a single match: simple tags (e.g., <h1>Title</h1>)
+                # and complex structures (e.g., <p><b>Text</b> • <b>More</b></p>) only differ in
+                # whether the inner content contains further markup
+                html_match = _RE_HTML_COMPLEX.match(stripped)
+            
+                if html_match:
+                    inner_content = html_match.group(2)
+                    is_simple = '<' not in inner_content
+                
+                    # Extract outer tags
+                    opening_tag = line[:line.find('>') + 1]
+                    closing_tag = line[line.rfind('<'):]
+                
+                    # Check if content needs translation
+                    if should_translate(inner_content):
+                        count += 1
+                        structure_writer.append({
                             "index": position_index,
-                            "type": "html_table",
+                            "type": "html_simple" if is_simple else "html_complex",
+                            "opening_tag": opening_tag,
+                            "content": inner_content,
+                            "closing_tag": closing_tag,
                             "value": line,
                             "translate": True,
-                            "translatable_cells": translatable_cells
+                            "count": count
+                        })
+                    
+                        content_writer.append({
+                            "count": count,
+                            "index": position_index,
+                            "type": "html_content" if is_simple else "html_complex_content",
+                            "value": inner_content
                         })
                     else:
-                        # No cells need translation
-                        structure_items.append({
+                        structure_writer.append({
                             "index": position_index,
                             "type": "html_preserved",
                             "value": line,
                             "translate": False
                         })
-                    
                     position_index += 1
                     continue
-                except Exception as e:
-                    # Log parsing error and fall back to default handling
-                    app_logger.error(f"Error parsing HTML table: {str(e)}")
 
-            # Handle self-closing tags
-            if line.count('<') == line.count('>') and re.match(r'^<[^>]*>$', line.strip()):
-                structure_items.append({
+                # Preserve unrecognized HTML
+                structure_writer.append({
                     "index": position_index,
-                    "type": "html_tag_only",
+                    "type": "html_unknown",
                     "value": line,
                     "translate": False
                 })
                 position_index += 1
                 continue
-                
-            # Handle HTML comments
-            if '<!--' in line and '-->' in line:
-                structure_items.append({
-                    "index": position_index,
-                    "type": "html_comment",
-                    "value": line,
-                    "translate": False
-                })
-                position_index += 1
-                continue
-                
-            # Handle simple HTML tags (e.g., <h1>Title</h1>)
-            simple_pattern = r'^<([a-zA-Z0-9]+)[^>]*>(.*?)</\1>$'
-            simple_match = re.match(simple_pattern, line.strip())
             
-            if simple_match and should_translate(simple_match.group(2)):
-                tag_name = simple_match.group(1)
-                content_text = simple_match.group(2)
-                
-                # Extract opening and closing tags
-                opening_tag = line[:line.find('>') + 1]
-                closing_tag = line[line.rfind('<'):]
-                
+            # Handle regular text
+            if should_translate(line):
                 count += 1
-                structure_items.append({
+                structure_writer.append({
                     "index": position_index,
-                    "type": "html_simple",
-                    "opening_tag": opening_tag,
-                    "content": content_text,
-                    "closing_tag": closing_tag,
+                    "type": "text",
                     "value": line,
                     "translate": True,
                     "count": count
                 })
-                
-                content_data.append({
+            
+                content_writer.append({
                     "count": count,
                     "index": position_index,
-                    "type": "html_content",
-                    "value": content_text
+                    "type": "text",
+                    "value": line
+                })
+            else:
+                # Other non-translatable content
+                structure_writer.append({
+                    "index": position_index,
+                    "type": "non_translatable",
+                    "value": line,
+                    "translate": False
                 })
-                position_index += 1
-                continue
-                
-            # Handle complex HTML structures (e.g., <p><b>Text</b> • <b>More</b></p>)
-            complex_pattern = r'^<([a-zA-Z0-9]+)[^>]*>(.*)</\1>$'
-            complex_match = re.match(complex_pattern, line.strip())
-            
-            if complex_match:
-                outer_tag = complex_match.group(1)
-                inner_content = complex_match.group(2)
-                
-                # Extract outer tags
-                opening_outer_tag = line[:line.find('>') + 1]
-                closing_outer_tag = line[line.rfind('<'):]
-                
-                # Check if content needs translation
-                if should_translate(inner_content):
-                    count += 1
-                    structure_items.append({
-                        "index": position_index,
-                        "type": "html_complex",
-                        "opening_tag": opening_outer_tag,
-                        "content": inner_content,
-                        "closing_tag": closing_outer_tag,
-                        "value": line,
-                        "translate": True,
-                        "count": count
-                    })
-                    
-                    content_data.append({
-                        "count": count,
-                        "index": position_index,
-                        "type": "html_complex_content",
-                        "value": inner_content
-                    })
-                else:
-                    structure_items.append({
-                        "index": position_index,
-                        "type": "html_preserved",
-                        "value": line,
-                        "translate": False
-                    })
-                position_index += 1
-                continue
-
-            # Preserve unrecognized HTML
-            structure_items.append({
-                "index": position_index,
-                "type": "html_unknown",
-                "value": line,
-                "translate": False
-            })
-            position_index += 1
-            continue
-            
-        # Handle regular text
-        if should_translate(line):
-            count += 1
-            structure_items.append({
-                "index": position_index,
-                "type": "text",
-                "value": line,
-                "translate": True,
-                "count": count
-            })
-            
-            content_data.append({
-                "count": count,
-                "index": position_index,
-                "type": "text",
-                "value": line
-            })
-        else:
-            # Other non-translatable content
-            structure_items.append({
-                "index": position_index,
-                "type": "non_translatable",
-                "value": line,
-                "translate": False
-            })
         
-        position_index += 1
-    
-    # Save document structure
-    structure_path = os.path.join(temp_folder, "structure.json")
-    with open(structure_path, "w", encoding="utf-8") as structure_file:
-        json.dump(structure_items, structure_file, ensure_ascii=False, indent=4)
-    
-    # Save content for translation
-    json_path = os.path.join(temp_folder, "src.json")
-    with open(json_path, "w", encoding="utf-8") as json_file:
-        json.dump(content_data, json_file, ensure_ascii=False, indent=4)
+            position_index += 1
     
     app_logger.info(f"Markdown content extracted to: {json_path}, total {count} lines to translate")
     return json_path
 
+def _rebuild_html_table(item, translations):
+    """
+    Put translated cell texts back into an HTML table line, preserving its structure.
+    Falls back to the original line if the HTML cannot be rebuilt.
+    """
+    try:
+        # Parse the original HTML
+        soup = BeautifulSoup(item["value"], 'html.parser')
+        
+        # Get all table cells
+        all_tds = soup.find_all('td')
+        
+        # Replace content in cells that need translation
+        for cell_info in item.get("translatable_cells", []):
+            cell_count = cell_info.get("count")
+            cell_index = cell_info.get("index")
+            
+            if cell_count in translations and cell_index < len(all_tds):
+                # Replace the text content while preserving HTML structure
+                # This maintains attributes and nested elements
+                current_cell = all_tds[cell_index]
+                
+                # If the cell has children elements, we need to be careful
+                if list(current_cell.children) and not all(isinstance(c, str) for c in current_cell.children):
+                    # Complex cell with nested elements - log this case
+                    app_logger.warning(f"Complex cell structure at index {cell_index}, translation may be incomplete")
+                    # Simple approach: replace text nodes only
+                    for text_node in current_cell.find_all(text=True, recursive=True):
+                        if text_node.strip() == cell_info.get("original_text"):
+                            text_node.replace_with(translations[cell_count])
+                else:
+                    # Simple text content - straightforward replacement
+                    current_cell.string = translations[cell_count]
+        
+        # Return the modified HTML for the final document
+        return str(soup)
+    except Exception as e:
+        # Log error and fall back to original content
+        app_logger.error(f"Error rebuilding HTML table: {str(e)}")
+        return item["value"]
+
 def write_translated_content_to_md(file_path, original_json_path, translated_json_path):
     """
     Write translated content to new Markdown file while preserving HTML structure
@@ -289,95 +329,56 @@ def write_translated_content_to_md(file_path, original_json_path, translated_jso
     
     # Load document structure
     structure_path = os.path.join(temp_folder, "structure.json")
-    with open(structure_path, "r", encoding="utf-8") as structure_file:
-        structure_items = json.load(structure_file)
+    structure_items = read_json(structure_path)
     
     # Load translation results
-    with open(translated_json_path, "r", encoding="utf-8") as translated_file:
-        translated_data = json.load(translated_file)
+    translated_data = read_json(translated_json_path)
     
     # Create translation mapping (count -> translated text)
-    translations = {}
-    for item in translated_data:
-        count = item.get("count")
-        if count:
-            translations[count] = item.get("translated", "")
+    translations = {
+        item["count"]: item.get("translated", "")
+        for item in translated_data
+        if item.get("count")
+    }
     
-    # Rebuild document
+    # Rebuild document, with hot lookups bound to locals
     final_lines = []
+    append_line = final_lines.append
+    get_translation = translations.get
     
     for item in structure_items:
         if not item.get("translate", False):
             # Keep original content for non-translated items
-            final_lines.append(item["value"])
+            append_line(item["value"])
+            continue
+        
+        # Insert translations
+        item_type = item["type"]
+        if item_type == "html_table":
+            append_line(_rebuild_html_table(item, translations))
+            continue
+        
+        translated = get_translation(item.get("count"))
+        if translated is None:
+            append_line(item["value"])
+        elif item_type in _HTML_WRAPPED_TYPES:
+            # Standard handling for simple and complex HTML
+            append_line(item["opening_tag"] + translated + item["closing_tag"])
         else:
-            # Insert translations
-            if item["type"] == "html_table":
-                try:
-                    # Parse the original HTML
-                    soup = BeautifulSoup(item["value"], 'html.parser')
-                    
-                    # Get all table cells
-                    all_tds = soup.find_all('td')
-                    
-                    # Replace content in cells that need translation
-                    for cell_info in item.get("translatable_cells", []):
-                        cell_count = cell_info.get("count")
-                        cell_index = cell_info.get("index")
-                        
-                        if cell_count in translations and cell_index < len(all_tds):
-                            # Replace the text content while preserving HTML structure
-                            # This maintains attributes and nested elements
-                            current_cell = all_tds[cell_index]
-                            
-                            # If the cell has children elements, we need to be careful
-                            if list(current_cell.children) and not all(isinstance(c, str) for c in current_cell.children):
-                                # Complex cell with nested elements - log this case
-                                app_logger.warning(f"Complex cell structure at index {cell_index}, translation may be incomplete")
-                                # Simple approach: replace text nodes only
-                                for text_node in current_cell.find_all(text=True, recursive=True):
-                                    if text_node.strip() == cell_info.get("original_text"):
-                                        text_node.replace_with(translations[cell_count])
-                            else:
-                                # Simple text content - straightforward replacement
-                                current_cell.string = translations[cell_count]
-                    
-                    # Add the modified HTML to the final document
-                    final_lines.append(str(soup))
-                except Exception as e:
-                    # Log error and fall back to original content
-                    app_logger.error(f"Error rebuilding HTML table: {str(e)}")
-                    final_lines.append(item["value"])
-            elif item["type"] in ["html_simple", "html_complex"]:
-                # Standard handling for simple and complex HTML
-                count = item.get("count")
-                if count in translations:
-                    final_lines.append(
-                        item["opening_tag"] + 
-                        translations[count] + 
-                        item["closing_tag"]
-                    )
-                else:
-                    final_lines.append(item["value"])
-            else:
-                # Regular text
-                count = item.get("count")
-                if count in translations:
-                    final_lines.append(translations[count])
-                else:
-                    final_lines.append(item["value"])
-    
-    # Join lines into final document
-    final_content = '\n'.join(final_lines)
+            # Regular text
+            append_line(translated)
     
     # Create output file
     result_folder = "result"
     os.makedirs(result_folder, exist_ok=True)
     result_path = os.path.join(result_folder, f"{os.path.splitext(os.path.basename(file_path))[0]}_translated.md")
     
-    # Write final content
-    with open(result_path, "w", encoding="utf-8") as result_file:
-        result_file.write(final_content)
+    # Stream lines through a large write buffer instead of joining the whole document in memory,
+    # keeping '\n'.join semantics (no newline after the last line)
+    with open(result_path, "w", encoding="utf-8", buffering=OUTPUT_BUFFER_SIZE) as result_file:
+        lines_iter = iter(final_lines)
+        result_file.write(next(lines_iter, ""))
+        result_file.writelines("\n" + line for line in lines_iter)
     
     app_logger.info(f"Translated Markdown document saved to: {result_path}")
     return result_path
\ No newline at end of file
@@ -1,388 +1,425 @@
-import json
 import os
+import shutil
+from collections import defaultdict
 from lxml import etree
-from zipfile import ZipFile
+from zipfile import ZIP_DEFLATED, ZipFile, ZipInfo
 from .skip_pipeline import should_translate
+from .json_io import NL_DECODE, NL_ENCODE, read_json, write_json
+from .zip_io import OUTPUT_COMPRESSLEVEL
 from config.log_config import app_logger
 
-def extract_ppt_content_to_json(file_path):
+NAMESPACES = {
+    'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
+    'p': 'http://schemas.openxmlformats.org/presentationml/2006/main'
+}
+
+# Chunk size for copying untouched archive members
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Shared slide parser: ID collection is unused for slide XML, huge_tree lifts the libxml2 limits for large slides
+_PARSER = etree.XMLParser(collect_ids=False, huge_tree=True)
+
+# Compiled once instead of parsing the expression on every slide, paragraph and run
+_TXBODY_XP = etree.XPath('.//p:txBody', namespaces=NAMESPACES)
+_P_XP = etree.XPath('.//a:p', namespaces=NAMESPACES)
+_ALL_T_XP = etree.XPath('.//a:t', namespaces=NAMESPACES)
+
+# Clark-notation tags for run-level lookups with iter()/find(), which bypass the XPath engine
+_A_R = '{%s}r' % NAMESPACES['a']
+_A_T = '{%s}t' % NAMESPACES['a']
+_A_RPR = '{%s}rPr' % NAMESPACES['a']
+_A_SRGB_PATH = '{%s}solidFill/{%s}srgbClr' % (NAMESPACES['a'], NAMESPACES['a'])
+
+# Run property attribute keys in Clark notation
+_SZ = '{%s}sz' % NAMESPACES['a']
+_B = '{%s}b' % NAMESPACES['a']
+_I = '{%s}i' % NAMESPACES['a']
+
+def _split_offsets(lengths, total_target):
     """
-    Extract text content from PowerPoint, processing each text run with different styles separately.
+    End offsets for splitting total_target characters in proportion to the given lengths.
+    Uses integer arithmetic only; the last offset is always total_target so the final part
+    takes the remainder.
+    Returns:
+        List of end offsets, one per length
     """
-    with ZipFile(file_path, 'r') as pptx:
-        slides = [name for name in pptx.namelist() if name.startswith('ppt/slides/slide') and name.endswith('.xml')]
+    if not lengths:
+        return []
+    total_length = sum(lengths)
+    offsets = []
+    position = 0
+    for length in lengths[:-1]:
+        if total_length:
+            position += total_target * length // total_length
+        offsets.append(position)
+    offsets.append(total_target)
+    return offsets
 
-    content_data = []
-    count = 0
-    namespaces = {
-        'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
-        'p': 'http://schemas.openxmlformats.org/presentationml/2006/main'
-    }
+def _run_style(run):
+    """
+    Style of a text run as a hashable (font_size, bold, italic, color) tuple, None for unset values.
+    Tuples compare in one step and double as dict keys when matching runs to segments.
+    """
+    rpr = run.find(_A_RPR)
+    if rpr is None:
+        return (None, None, None, None)
+    # Fetch the attribute mapping once and read all run properties from it
+    attrib = rpr.attrib
+    solid_fill = rpr.find(_A_SRGB_PATH)
+    return (
+        attrib.get(_SZ) or None,
+        attrib.get(_B) or None,
+        attrib.get(_I) or None,
+        solid_fill.get('val') if solid_fill is not None else None,
+    )
 
-    with ZipFile(file_path, 'r') as pptx:
-        for slide_index, slide_path in enumerate(slides, start=1):
-            slide_xml = pptx.read(slide_path)
-            slide_tree = etree.fromstring(slide_xml)
+def _style_key(style):
+    """Hashable key for a segment style loaded from JSON, where tuples come back as lists."""
+    return tuple(style) if style is not None else None
+
+def _parse_slide(pptx, slide_path):
+    """Parse a slide straight from the deflate stream, without an intermediate bytes copy."""
+    with pptx.open(slide_path) as slide_file:
+        return etree.parse(slide_file, _PARSER).getroot()
+
+def _extract_slide(slide_tree, slide_index):
+    """
+    Collect the translatable style segments of one slide.
+    Counts are assigned by the caller, in slide order.
+    
+    Returns:
+        list: content items without "count"
+    """
+    slide_items = []
 
-            # Find all text boxes
-            text_boxes = slide_tree.xpath('.//p:txBody', namespaces=namespaces)
+    # Find all text boxes
+    text_boxes = _TXBODY_XP(slide_tree)
+    
+    for text_box_index, text_box in enumerate(text_boxes, start=1):
+        # Get all paragraphs in the text box
+        paragraphs = _P_XP(text_box)
+        
+        current_style = None
+        current_segment = {
+            "slide_index": slide_index,
+            "text_box_index": text_box_index,
+            "paragraphs": [],
+            "style_segments": []
+        }
+        current_text = []
+        
+        for p_index, paragraph in enumerate(paragraphs):
+            # Get each text run in the paragraph
+            text_runs = list(paragraph.iter(_A_R))
             
-            for text_box_index, text_box in enumerate(text_boxes, start=1):
-                # Get all paragraphs in the text box
-                paragraphs = text_box.xpath('.//a:p', namespaces=namespaces)
+            for run_index, text_run in enumerate(text_runs):
+                # Extract the text content
+                text_node = text_run.find(_A_T)
+                node_text = text_node.text if text_node is not None and text_node.text else ""
                 
-                current_style = None
-                current_segment = {
-                    "slide_index": slide_index,
-                    "text_box_index": text_box_index,
-                    "paragraphs": [],
-                    "style_segments": []
-                }
-                current_text = []
+                # Extract style information as a hashable (font_size, bold, italic, color) key
+                style_info = _run_style(text_run)
                 
-                for p_index, paragraph in enumerate(paragraphs):
-                    # Get each text run in the paragraph
-                    text_runs = paragraph.xpath('.//a:r', namespaces=namespaces)
-                    
-                    for run_index, text_run in enumerate(text_runs):
-                        # Extract the text content
-                        text_node = text_run.xpath('./a:t', namespaces=namespaces)
-                        node_text = text_node[0].text if text_node and text_node[0].text else ""
-                        
-                        # Extract style information
-                        rpr = text_run.xpath('./a:rPr', namespaces=namespaces)
-                        style_info = {}
-                        
-                        if rpr:
-                            # Font size
-                            sz = rpr[0].get('{%s}sz' % namespaces['a'])
-                            if sz:
-                                style_info['font_size'] = sz
-                            
-                            # Bold
-                            b = rpr[0].get('{%s}b' % namespaces['a'])
-                            if b:
-                                style_info['bold'] = b
-                            
-                            # Italic
-                            i = rpr[0].get('{%s}i' % namespaces['a'])
-                            if i:
-                                style_info['italic'] = i
-                            
-                            # Font color
-                            solid_fill = rpr[0].xpath('./a:solidFill/a:srgbClr', namespaces=namespaces)
-                            if solid_fill:
-                                style_info['color'] = solid_fill[0].get('val')
-                        
-                        # Check if style has changed
-                        if style_info != current_style and current_text:
-                            # Save previous segment
-                            segment_text = "".join(current_text).replace("\n", "␊").replace("\r", "␍")
-                            if should_translate(segment_text):
-                                count += 1
-                                content_data.append({
-                                    "count": count,
-                                    "slide_index": slide_index,
-                                    "text_box_index": text_box_index,
-                                    "p_index": p_index,
-                                    "type": "style_segment",
-                                    "value": segment_text,
-                                    "style": current_style,
-                                    "position": len(current_segment["style_segments"])
-                                })
-                                
-                                # Add to text box data for structure
-                                current_segment["style_segments"].append({
-                                    "position": len(current_segment["style_segments"]),
-                                    "text": segment_text,
-                                    "style": current_style
-                                })
-                            
-                            # Start new segment
-                            current_text = []
-                        
-                        current_style = style_info
-                        if node_text:
-                            current_text.append(node_text)
-                    
-                    # Add paragraph break if needed - only if we're not at the last paragraph
-                    # AND there were text runs in this paragraph
-                    if text_runs and p_index < len(paragraphs) - 1:
-                        current_text.append("\n")
-                
-                # Save the last segment
-                if current_text:
-                    segment_text = "".join(current_text).replace("\n", "␊").replace("\r", "␍")
+                # Check if style has changed
+                if style_info != current_style and current_text:
+                    # Save previous segment
+                    segment_text = "".join(current_text).translate(NL_ENCODE)
                     if should_translate(segment_text):
-                        count += 1
-                        content_data.append({
-                            "count": count,
+                        slide_items.append({
                             "slide_index": slide_index,
                             "text_box_index": text_box_index,
-                            "p_index": p_index if 'p_index' in locals() else 0,  # In case there were no paragraphs
+                            "p_index": p_index,
                             "type": "style_segment",
                             "value": segment_text,
                             "style": current_style,
                             "position": len(current_segment["style_segments"])
                         })
                         
-                        # Add to text box data
+                        # Add to text box data for structure
                         current_segment["style_segments"].append({
                             "position": len(current_segment["style_segments"]),
                             "text": segment_text,
                             "style": current_style
                         })
+                    
+                    # Start new segment
+                    current_text = []
+                
+                current_style = style_info
+                if node_text:
+                    current_text.append(node_text)
+            
+            # Add paragraph break if needed - only if we're not at the last paragraph
+            # AND there were text runs in this paragraph
+            if text_runs and p_index < len(paragraphs) - 1:
+                current_text.append("\n")
+        
+        # Save the last segment
+        if current_text:
+            segment_text = "".join(current_text).translate(NL_ENCODE)
+            if should_translate(segment_text):
+                slide_items.append({
+                    "slide_index": slide_index,
+                    "text_box_index": text_box_index,
+                    "p_index": p_index if 'p_index' in locals() else 0,  # In case there were no paragraphs
+                    "type": "style_segment",
+                    "value": segment_text,
+                    "style": current_style,
+                    "position": len(current_segment["style_segments"])
+                })
+                
+                # Add to text box data
+                current_segment["style_segments"].append({
+                    "position": len(current_segment["style_segments"]),
+                    "text": segment_text,
+                    "style": current_style
+                })
+
+    return slide_items
+
+def extract_ppt_content_to_json(file_path):
+    """
+    Extract text content from PowerPoint, processing each text run with different styles separately.
+    """
+    # Open the archive once for both listing and reading the slides
+    with ZipFile(file_path, 'r') as pptx:
+        slides = [name for name in pptx.namelist() if name.startswith('ppt/slides/slide') and name.endswith('.xml')]
+        # Slides are parsed serially: lxml does the heavy lifting in C, and a process pool would
+        # re-import the Gradio app in every spawned worker
+        items_per_slide = [
+            _extract_slide(_parse_slide(pptx, slide_path), slide_index)
+            for slide_index, slide_path in enumerate(slides, start=1)
+        ]
+
+    # Assign counts in slide order
+    content_data = []
+    count = 0
+    for slide_items in items_per_slide:
+        for item in slide_items:
+            count += 1
+            content_data.append({"count": count, **item})
 
     # Save content to JSON
     filename = os.path.splitext(os.path.basename(file_path))[0]
     temp_folder = os.path.join("temp", filename)
     os.makedirs(temp_folder, exist_ok=True)
     json_path = os.path.join(temp_folder, "src.json")
-    with open(json_path, "w", encoding="utf-8") as json_file:
-        json.dump(content_data, json_file, ensure_ascii=False, indent=4)
+    write_json(json_path, content_data)
 
     return json_path
 
+def _rewrite_slide(slide_tree, slide_index, slide_segments, translations, node_counts):
+    """
+    Write translations into one parsed slide in place.
+    Style segments are matched to runs by style; slides without segments fall back to text nodes,
+    using node_counts ({text_node_index: count}).
+    """
+    if slide_segments:  # If we have style segments for this slide
+        text_boxes = _TXBODY_XP(slide_tree)
+        
+        # Group segments by text box
+        text_box_segments = defaultdict(list)
+        for item in slide_segments:
+            text_box_segments[item['text_box_index']].append(item)
+        
+        # Process each text box
+        for text_box_index, text_box in enumerate(text_boxes, start=1):
+            if text_box_index not in text_box_segments:
+                continue
+                
+            # Index the runs of this text box by style: {style key: [(p_index, run), ...]}
+            runs_by_style = defaultdict(list)
+            paragraphs = _P_XP(text_box)
+            
+            for p_index, paragraph in enumerate(paragraphs, start=0):
+                runs = paragraph.iter(_A_R)
+                for run in runs:
+                    runs_by_style[_run_style(run)].append((p_index, run))
+            
+            # Process segments for this text box
+            for segment in text_box_segments[text_box_index]:
+                style = segment['style']
+                count = segment['count']
+                
+                # Get translation for this segment
+                translated_text = translations.get(count)
+                if not translated_text:
+                    app_logger.warning(f"Missing translation for count {count}. Skipping.")
+                    continue
+                
+                # Handle paragraph breaks in translations
+                translated_text = translated_text.translate(NL_DECODE)
+                
+                # Don't split paragraphs, but preserve original paragraph structure
+                # Find all runs with matching style, grouped by paragraph
+                matching_runs_by_paragraph = defaultdict(list)
+                for p_idx, run in runs_by_style.get(_style_key(style), ()):
+                    matching_runs_by_paragraph[p_idx].append(run)
+                
+                # If no matching runs found, log warning and continue
+                if not matching_runs_by_paragraph:
+                    app_logger.warning(f"No matching runs found for segment {count} with style {style}")
+                    continue
+                
+                # Get all paragraph indices and sort them
+                paragraph_indices = sorted(matching_runs_by_paragraph.keys())
+                
+                # Get the original formatted paragraph texts
+                original_paragraph_texts = []
+                for p_idx in paragraph_indices:
+                    p_runs = matching_runs_by_paragraph[p_idx]
+                    p_text = []
+                    for run in p_runs:
+                        text_node = run.find(_A_T)
+                        if text_node is not None and text_node.text:
+                            p_text.append(text_node.text)
+                    if p_text:
+                        original_paragraph_texts.append("".join(p_text))
+                
+                # If translated text has newlines, try to map to paragraphs
+                paragraphs_to_write = []
+                if "\n" in translated_text:
+                    paragraphs_to_write = translated_text.split("\n")
+                else:
+                    # If no newlines but multiple original paragraphs, try smart allocation
+                    if len(paragraph_indices) > 1:
+                        # Simple strategy: allocate text based on original paragraph length ratios
+                        offsets = _split_offsets([len(text) for text in original_paragraph_texts], len(translated_text))
+                        current_pos = 0
+                        for end_pos in offsets:
+                            paragraphs_to_write.append(translated_text[current_pos:end_pos])
+                            current_pos = end_pos
+                    else:
+                        # If only one paragraph, use the entire translated text
+                        paragraphs_to_write = [translated_text]
+                
+                # Distribute translated text to paragraphs
+                for i, p_idx in enumerate(paragraph_indices):
+                    if i < len(paragraphs_to_write):
+                        paragraph_text = paragraphs_to_write[i]
+                        runs = matching_runs_by_paragraph[p_idx]
+                        
+                        # Clear all matching runs
+                        for run in runs:
+                            text_node = run.find(_A_T)
+                            if text_node is not None:
+                                text_node.text = ""
+                        
+                        # Set text to first run
+                        if runs:
+                            text_node = runs[0].find(_A_T)
+                            if text_node is not None:
+                                text_node.text = paragraph_text
+                    else:
+                        # Clear excess paragraphs
+                        runs = matching_runs_by_paragraph[p_idx]
+                        for run in runs:
+                            text_node = run.find(_A_T)
+                            if text_node is not None:
+                                text_node.text = ""
+    
+    else:  # Fall back to node-based translation if no style segments
+        text_nodes = _ALL_T_XP(slide_tree)
+        for text_node_index, text_node in enumerate(text_nodes, start=1):
+            text_value = text_node.text if text_node.text else ""
+            if should_translate(text_value):
+                count = node_counts.get(text_node_index)
+                if count:
+                    translated_text = translations.get(count)
+                    if translated_text is not None:
+                        translated_text = translated_text.translate(NL_DECODE)
+                        text_node.text = translated_text
+                    else:
+                        app_logger.warning(
+                            f"Missing translation for count {count} (Slide: {slide_index}, Node: {text_node_index}). Original text: '{text_value}'"
+                        )
+                else:
+                    app_logger.warning(
+                        f"Could not find matching count for (Slide: {slide_index}, Node: {text_node_index}). Text: '{text_value}'"
+                    )
+
+def _serialize_slide(slide_tree):
+    """Serialize a slide tree for the output archive."""
+    return etree.tostring(slide_tree, xml_declaration=True, encoding="UTF-8", standalone="yes")
+
 def write_translated_content_to_ppt(file_path, original_json_path, translated_json_path):
     """
     Write translated content back to the PowerPoint file while preserving the format and structure.
     """
     # Load original and translated JSON
-    with open(original_json_path, "r", encoding="utf-8") as original_file:
-        original_data = json.load(original_file)
-    with open(translated_json_path, "r", encoding="utf-8") as translated_file:
-        translated_data = json.load(translated_file)
+    original_data = read_json(original_json_path)
+    translated_data = read_json(translated_json_path)
 
     # Create a mapping of translations
-    translations = {str(item["count"]): item["translated"] for item in translated_data}
-
-    # Open the PowerPoint file as a ZIP archive
-    with ZipFile(file_path, 'r') as pptx:
-        slides = [name for name in pptx.namelist() if name.startswith('ppt/slides/slide') and name.endswith('.xml')]
+    translations = {item["count"]: item["translated"] for item in translated_data}
 
-    # Create temporary directory with proper nesting structure
     filename = os.path.splitext(os.path.basename(file_path))[0]
-    temp_folder = os.path.join("temp", filename)
-    os.makedirs(temp_folder, exist_ok=True)
 
-    # Define namespaces that might be needed
-    namespaces = {
-        'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
-        'p': 'http://schemas.openxmlformats.org/presentationml/2006/main'
-    }
+    # Serialized slides, written straight into the output archive
+    modified_slides = {}
 
-    # Replace text in each slide
+    # Open the PowerPoint file as a ZIP archive once, for listing, reading and repacking
     with ZipFile(file_path, 'r') as pptx:
-        for slide_index, slide_path in enumerate(slides, start=1):
-            slide_xml = pptx.read(slide_path)
-            slide_tree = etree.fromstring(slide_xml)
-            
-            # Process style segments for this slide
-            slide_segments = [item for item in original_data if item['slide_index'] == slide_index and item['type'] == 'style_segment']
-            
-            if slide_segments:  # If we have style segments for this slide
-                text_boxes = slide_tree.xpath('.//p:txBody', namespaces=namespaces)
-                
-                # Group segments by text box
-                text_box_segments = {}
-                for item in slide_segments:
-                    tb_index = item['text_box_index']
-                    if tb_index not in text_box_segments:
-                        text_box_segments[tb_index] = []
-                    text_box_segments[tb_index].append(item)
-                
-                # Process each text box
-                for text_box_index, text_box in enumerate(text_boxes, start=1):
-                    if text_box_index not in text_box_segments:
-                        continue
-                        
-                    # Create a map of paragraph runs for this text box
-                    paragraph_runs = {}
-                    paragraphs = text_box.xpath('.//a:p', namespaces=namespaces)
-                    
-                    for p_index, paragraph in enumerate(paragraphs, start=0):
-                        if p_index not in paragraph_runs:
-                            paragraph_runs[p_index] = []
-                        
-                        runs = paragraph.xpath('.//a:r', namespaces=namespaces)
-                        for run in runs:
-                            # Get the style of this run
-                            rpr = run.xpath('./a:rPr', namespaces=namespaces)
-                            style_info = {}
-                            
-                            if rpr:
-                                # Font size
-                                sz = rpr[0].get('{%s}sz' % namespaces['a'])
-                                if sz:
-                                    style_info['font_size'] = sz
-                                
-                                # Bold
-                                b = rpr[0].get('{%s}b' % namespaces['a'])
-                                if b:
-                                    style_info['bold'] = b
-                                
-                                # Italic
-                                i = rpr[0].get('{%s}i' % namespaces['a'])
-                                if i:
-                                    style_info['italic'] = i
-                                
-                                # Font color
-                                solid_fill = rpr[0].xpath('./a:solidFill/a:srgbClr', namespaces=namespaces)
-                                if solid_fill:
-                                    style_info['color'] = solid_fill[0].get('val')
-                            
-                            paragraph_runs[p_index].append((run, style_info))
-                    
-                    # Process segments for this text box
-                    for segment in text_box_segments[text_box_index]:
-                        style = segment['style']
-                        count = segment['count']
-                        
-                        # Get translation for this segment
-                        translated_text = translations.get(str(count), None)
-                        if not translated_text:
-                            app_logger.warning(f"Missing translation for count {count}. Skipping.")
-                            continue
-                        
-                        # Handle paragraph breaks in translations
-                        translated_text = translated_text.replace("␊", "\n").replace("␍", "\r")
-                        
-                        # Don't split paragraphs, but preserve original paragraph structure
-                        # Find all runs with matching style, grouped by paragraph
-                        matching_runs_by_paragraph = {}
-                        for p_idx, runs in paragraph_runs.items():
-                            for run, run_style in runs:
-                                if run_style == style:
-                                    if p_idx not in matching_runs_by_paragraph:
-                                        matching_runs_by_paragraph[p_idx] = []
-                                    matching_runs_by_paragraph[p_idx].append(run)
-                        
-                        # If no matching runs found, log warning and continue
-                        if not matching_runs_by_paragraph:
-                            app_logger.warning(f"No matching runs found for segment {count} with style {style}")
-                            continue
-                        
-                        # Get all paragraph indices and sort them
-                        paragraph_indices = sorted(matching_runs_by_paragraph.keys())
-                        
-                        # Get the original formatted paragraph texts
-                        original_paragraph_texts = []
-                        for p_idx in paragraph_indices:
-                            p_runs = matching_runs_by_paragraph[p_idx]
-                            p_text = []
-                            for run in p_runs:
-                                text_node = run.xpath('./a:t', namespaces=namespaces)
-                                if text_node and text_node[0].text:
-                                    p_text.append(text_node[0].text)
-                            if p_text:
-                                original_paragraph_texts.append("".join(p_text))
-                        
-                        # If translated text has newlines, try to map to paragraphs
-                        paragraphs_to_write = []
-                        if "\n" in translated_text:
-                            paragraphs_to_write = translated_text.split("\n")
-                        else:
-                            # If no newlines but multiple original paragraphs, try smart allocation
-                            if len(paragraph_indices) > 1:
-                                # Simple strategy: allocate text based on original paragraph length ratios
-                                total_original_length = sum(len(text) for text in original_paragraph_texts)
-                                current_pos = 0
-                                
-                                for i, original_text in enumerate(original_paragraph_texts):
-                                    # Calculate proportion of text for this paragraph
-                                    if i == len(original_paragraph_texts) - 1:
-                                        # Last paragraph gets all remaining text
-                                        paragraphs_to_write.append(translated_text[current_pos:])
-                                    else:
-                                        ratio = len(original_text) / total_original_length
-                                        chars_to_take = int(len(translated_text) * ratio)
-                                        paragraphs_to_write.append(translated_text[current_pos:current_pos + chars_to_take])
-                                        current_pos += chars_to_take
-                            else:
-                                # If only one paragraph, use the entire translated text
-                                paragraphs_to_write = [translated_text]
-                        
-                        # Distribute translated text to paragraphs
-                        for i, p_idx in enumerate(paragraph_indices):
-                            if i < len(paragraphs_to_write):
-                                paragraph_text = paragraphs_to_write[i]
-                                runs = matching_runs_by_paragraph[p_idx]
-                                
-                                # Clear all matching runs
-                                for run in runs:
-                                    text_node = run.xpath('./a:t', namespaces=namespaces)
-                                    if text_node:
-                                        text_node[0].text = ""
-                                
-                                # Set text to first run
-                                if runs:
-                                    text_node = runs[0].xpath('./a:t', namespaces=namespaces)
-                                    if text_node:
-                                        text_node[0].text = paragraph_text
-                            else:
-                                # Clear excess paragraphs
-                                runs = matching_runs_by_paragraph[p_idx]
-                                for run in runs:
-                                    text_node = run.xpath('./a:t', namespaces=namespaces)
-                                    if text_node:
-                                        text_node[0].text = ""
-            
-            else:  # Fall back to node-based translation if no style segments
-                text_nodes = slide_tree.xpath('.//a:t', namespaces=namespaces)
-                for text_node_index, text_node in enumerate(text_nodes, start=1):
-                    text_value = text_node.text if text_node.text else ""
-                    if should_translate(text_value):
-                        count = next((item['count'] for item in original_data if 
-                                     item['slide_index'] == slide_index and 
-                                     item.get('text_node_index') == text_node_index), None)
-                        if count:
-                            translated_text = translations.get(str(count), None)
-                            if translated_text is not None:
-                                translated_text = translated_text.replace("␊", "\n").replace("␍", "\r")
-                                text_node.text = translated_text
-                            else:
-                                app_logger.warning(
-                                    f"Missing translation for count {count} (Slide: {slide_index}, Node: {text_node_index}). Original text: '{text_value}'"
-                                )
-                        else:
-                            app_logger.warning(
-                                f"Could not find matching count for (Slide: {slide_index}, Node: {text_node_index}). Text: '{text_value}'"
-                            )
+        slides = [name for name in pptx.namelist() if name.startswith('ppt/slides/slide') and name.endswith('.xml')]
+        slide_set = frozenset(slides)
 
-            # Save modified slide
-            modified_slide_path = os.path.join(temp_folder, slide_path)
-            os.makedirs(os.path.dirname(modified_slide_path), exist_ok=True)
-            with open(modified_slide_path, "wb") as modified_slide:
-                modified_slide.write(etree.tostring(slide_tree, xml_declaration=True, encoding="UTF-8", standalone="yes"))
+        # Index original items once: style segments per slide, and counts per text node of each slide
+        # for the node-based fallback, keeping the first match like a linear search would
+        segments_by_slide = defaultdict(list)
+        node_counts_by_slide = defaultdict(dict)
+        for item in original_data:
+            if item['type'] == 'style_segment':
+                segments_by_slide[item['slide_index']].append(item)
+            text_node_index = item.get('text_node_index')
+            if text_node_index is not None:
+                node_counts_by_slide[item['slide_index']].setdefault(text_node_index, item['count'])
 
-    # Create a new PowerPoint file with modified content
-    result_folder = "result"
-    os.makedirs(result_folder, exist_ok=True)
+        # Replace text in each slide
+        for slide_index, slide_path in enumerate(slides, start=1):
+            slide_tree = _parse_slide(pptx, slide_path)
+            _rewrite_slide(
+                slide_tree, slide_index, segments_by_slide.get(slide_index, ()),
+                translations, node_counts_by_slide.get(slide_index, {})
+            )
+            # Keep the modified slide in memory instead of a temp file round-trip
+            modified_slides[slide_path] = _serialize_slide(slide_tree)
+
+        # Create a new PowerPoint file with modified content
+        result_folder = "result"
+        os.makedirs(result_folder, exist_ok=True)
     
-    # Define the output path
-    result_path = os.path.join(result_folder, f"{filename}_translated.pptx")
+        # Define the output path
+        result_path = os.path.join(result_folder, f"{filename}_translated.pptx")
     
-    # Remove existing file if it exists
-    if os.path.exists(result_path):
-        os.remove(result_path)
+        # Remove existing file if it exists
+        if os.path.exists(result_path):
+            os.remove(result_path)
 
-    # Create a new PowerPoint file with modified content
-    with ZipFile(file_path, 'r') as original_pptx:
-        with ZipFile(result_path, 'w') as new_pptx:
+        # Create a new PowerPoint file with modified content
+        # Slides are deflated like in any PPTX; copied members keep their own compress_type via their ZipInfo
+        with ZipFile(result_path, 'w', compression=ZIP_DEFLATED, compresslevel=OUTPUT_COMPRESSLEVEL) as new_pptx:
             # Copy all files except slides
-            for item in original_pptx.infolist():
-                if item.filename not in slides:
-                    new_pptx.writestr(item, original_pptx.read(item.filename))
-            
+            for item in pptx.infolist():
+                if item.filename not in slide_set:
+                    # Write through a fresh ZipInfo: writing updates offsets and sizes on the info object,
+                    # which must stay valid for reads from the source archive
+                    member_info = ZipInfo(item.filename, date_time=item.date_time)
+                    member_info.compress_type = item.compress_type
+                    member_info.external_attr = item.external_attr
+                    # Lets zipfile pick zip64 up front for very large members
+                    member_info.file_size = item.file_size
+                    # Stream in chunks so large embedded media is never fully loaded into memory
+                    with pptx.open(item) as src, new_pptx.open(member_info, 'w') as dst:
+                        shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+        
             # Add modified slides
             for slide in slides:
-                modified_slide_path = os.path.join(temp_folder, slide)
-                if os.path.exists(modified_slide_path):
-                    new_pptx.write(modified_slide_path, slide)
+                if slide in modified_slides:
+                    new_pptx.writestr(slide, modified_slides[slide])
                 else:
                     # If modified slide doesn't exist, use original
-                    app_logger.warning(f"Modified slide not found: {modified_slide_path}. Using original slide.")
-                    new_pptx.writestr(slide, original_pptx.read(slide))
+                    app_logger.warning(f"Modified slide not found: {slide}. Using original slide.")
+                    new_pptx.writestr(slide, pptx.read(slide))
 
     app_logger.info(f"Translated PowerPoint saved to: {result_path}")
     return result_path
\ No newline at end of file
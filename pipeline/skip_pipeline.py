@@ -1,9 +1,25 @@
 import regex as re
+from functools import lru_cache
 
 def is_multibyte(text):
     return bool(re.search(r'[\u4e00-\u9fff\u3040-\u30ff\u3400-\u4dbf\uFF00-\uFFEF]', text, re.UNICODE))
 
+# Strings up to this length are memoized; documents repeat short labels and table values heavily,
+# while long paragraphs rarely repeat and would keep old documents' text alive between runs
+SHOULD_TRANSLATE_CACHE_LENGTH = 256
+
+# Text without a single word character is always rejected by the punctuation rule in
+# _should_translate; checking it first keeps bullets and separators out of the cache
+_HAS_WORD_CHAR = re.compile(r'\w').search
+
 def should_translate(text_value):
+    if not _HAS_WORD_CHAR(text_value):
+        return False
+    if len(text_value) <= SHOULD_TRANSLATE_CACHE_LENGTH:
+        return _should_translate_cached(text_value)
+    return _should_translate(text_value)
+
+def _should_translate(text_value):
     text_value = text_value.strip()
 
     # Skip empty values
@@ -55,4 +71,7 @@ def should_translate(text_value):
         return False
 
     # Otherwise, translate
-    return True
\ No newline at end of file
+    return True
+
+# Bounded to a few MB of short strings
+_should_translate_cached = lru_cache(maxsize=8192)(_should_translate)
\ No newline at end of file
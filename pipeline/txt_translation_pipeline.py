@@ -1,6 +1,6 @@
-import json
 import os
 from .skip_pipeline import should_translate
+from .json_io import read_json, write_json
 from config.log_config import app_logger
 
 def extract_txt_content_to_json(file_path):
@@ -54,17 +54,21 @@ def extract_txt_content_to_json(file_path):
     
     # Save translation queue
     json_path = os.path.join(temp_folder, "src.json")
-    with open(json_path, "w", encoding="utf-8") as json_file:
-        json.dump(content_data, json_file, ensure_ascii=False, indent=4)
+    write_json(json_path, content_data)
     
     # Save all content with flags
     all_content_path = os.path.join(temp_folder, "all_content.json")
-    with open(all_content_path, "w", encoding="utf-8") as all_file:
-        json.dump(all_content_data, all_file, ensure_ascii=False, indent=4)
+    write_json(all_content_path, all_content_data)
     
     app_logger.info(f"TXT content extracted to: {json_path}, {translate_count} translatable from {count} total paragraphs")
     return json_path
 
+def _pick_text(item, translation_map):
+    """Use the translation if available, otherwise the original text."""
+    if item.get("needs_translation", True) and item["count"] in translation_map:
+        return translation_map[item["count"]]
+    return item["value"]
+
 def write_translated_content_to_txt(file_path, original_json_path, translated_json_path):
     """
     Write translated content back to a new TXT file, maintaining original paragraph format
@@ -74,11 +78,8 @@ def write_translated_content_to_txt(file_path, original_json_path, translated_js
     temp_folder = os.path.join("temp", filename)
     all_content_path = os.path.join(temp_folder, "all_content.json")
     
-    with open(all_content_path, "r", encoding="utf-8") as all_file:
-        all_content_data = json.load(all_file)
-        
-    with open(translated_json_path, "r", encoding="utf-8") as translated_file:
-        translated_data = json.load(translated_file)
+    all_content_data = read_json(all_content_path)
+    translated_data = read_json(translated_json_path)
     
     # Create translation map
     translation_map = {item["count"]: item["translated"] for item in translated_data}
@@ -88,20 +89,11 @@ def write_translated_content_to_txt(file_path, original_json_path, translated_js
     os.makedirs(result_folder, exist_ok=True)
     result_path = os.path.join(result_folder, f"{filename}_translated.txt")
     
-    # Write content to new file
+    # Write content to new file, each paragraph followed by a blank line
     with open(result_path, "w", encoding="utf-8") as result_file:
-        for item in all_content_data:
-            count = item["count"]
-            needs_translation = item.get("needs_translation", True)
-            
-            # Use translation if available, otherwise use original text
-            if needs_translation and count in translation_map:
-                text_to_write = translation_map[count]
-            else:
-                text_to_write = item["value"]
-            
-            # Write text with paragraph separator
-            result_file.write(text_to_write + "\n\n")
+        result_file.writelines(
+            f"{_pick_text(item, translation_map)}\n\n" for item in all_content_data
+        )
     
     app_logger.info(f"Translated TXT document saved to: {result_path}")
     return result_path
\ No newline at end of file
@@ -1,11 +1,76 @@
-import json
 import os
+import re
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
 from lxml import etree
-from zipfile import ZipFile
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile, ZipInfo
 from .skip_pipeline import should_translate
+from .json_io import NL_DECODE, NL_ENCODE, read_json, write_json
+from .zip_io import OUTPUT_COMPRESSLEVEL
 from config.log_config import app_logger
 
-def extract_word_content_to_json(file_path):
+NAMESPACES = {'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'}
+
+# Documents with more header/footer parts than this parse and serialize them in a thread pool
+PARALLEL_PART_THRESHOLD = 4
+
+# Media formats that are already compressed and gain nothing from deflate
+PRECOMPRESSED_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.woff', '.woff2')
+
+# Shared parser for document, header and footer parts: ID collection is unused, huge_tree lifts the
+# libxml2 limits for very large documents and entities are never expanded
+_PARSER = etree.XMLParser(huge_tree=True, collect_ids=False, resolve_entities=False)
+
+# Compiled once instead of parsing the expression for every block, cell and run
+_BLOCKS_XP = etree.XPath('.//*[self::w:p or self::w:tbl]', namespaces=NAMESPACES)
+_HEADING_XP = etree.XPath('.//w:pStyle[@w:val="Heading1" or @w:val="Heading2" or @w:val="Heading3"]', namespaces=NAMESPACES)
+_NUMPR_XP = etree.XPath('.//w:numPr', namespaces=NAMESPACES)
+_P_XP = etree.XPath('.//w:p', namespaces=NAMESPACES)
+_R_XP = etree.XPath('.//w:r', namespaces=NAMESPACES)
+_TBL_XP = etree.XPath('.//w:tbl', namespaces=NAMESPACES)
+_TR_XP = etree.XPath('.//w:tr', namespaces=NAMESPACES)
+_TC_XP = etree.XPath('.//w:tc', namespaces=NAMESPACES)
+_RPR_XP = etree.XPath('./w:rPr', namespaces=NAMESPACES)
+_RPR_CHILDREN_XP = etree.XPath('./w:rPr/*', namespaces=NAMESPACES)
+
+# Leading list marker ("1.", "a)", bullet, dash or asterisk) followed by the item text
+_NUMBERING_RE = re.compile(r'^(\d+[\.\)]|\w+[\.\)]|\•|\-|\*)\s+(.*)$')
+
+# Fields of an item written by update_json_structure_after_translation
+_RESTRUCTURED_KEYS = {"id", "count", "type", "translated"}
+
+# Clark-notation tags, compared directly against element.tag and walked with iter()
+_W_P = '{%s}p' % NAMESPACES['w']
+_W_TBL = '{%s}tbl' % NAMESPACES['w']
+_W_T = '{%s}t' % NAMESPACES['w']
+
+def _element_text(element):
+    """Concatenated text of all w:t nodes under an element, in document order."""
+    return "".join(text_node.text for text_node in element.iter(_W_T) if text_node.text)
+
+def _cell_text(cell):
+    """
+    Text of a table cell: each non-empty paragraph followed by a newline unless it is the last one.
+    Parts are collected in a list and joined once, then stripped.
+    """
+    cell_paragraphs = _P_XP(cell)
+    last_index = len(cell_paragraphs) - 1
+    parts = []
+    for cell_para_idx, cell_paragraph in enumerate(cell_paragraphs):
+        para_text = _element_text(cell_paragraph)
+        if para_text:
+            parts.append(para_text)
+            if cell_para_idx < last_index:
+                parts.append("\n")
+    return "".join(parts).strip()
+
+def extract_word_content(file_path):
+    """
+    Extract translatable paragraphs, table cells and header/footer text from a Word document.
+    Returns:
+        Tuple of (content_data, temp_folder) where content_data is the list of extracted items
+    """
     with ZipFile(file_path, 'r') as docx:
         document_xml = docx.read('word/document.xml')
         
@@ -18,33 +83,26 @@ def extract_word_content_to_json(file_path):
         for hf_file in header_footer_files:
             header_footer_content[hf_file] = docx.read(hf_file)
 
-    namespaces = {'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'}
-    document_tree = etree.fromstring(document_xml)
+    document_tree = etree.fromstring(document_xml, _PARSER)
 
     content_data = []
     item_id = 0
     
     # Get all block elements for indexing
-    block_elements = document_tree.xpath('.//*[self::w:p or self::w:tbl]', namespaces=namespaces)
+    block_elements = _BLOCKS_XP(document_tree)
     
     # Process all paragraphs and tables in main document
-    for element in block_elements:
-        element_type = element.tag.split('}')[-1]
-        element_index = block_elements.index(element)
+    for element_index, element in enumerate(block_elements):
+        element_tag = element.tag
         
-        if element_type == 'p':
-            is_heading = bool(element.xpath('.//w:pStyle[@w:val="Heading1" or @w:val="Heading2" or @w:val="Heading3"]', namespaces=namespaces))
-            has_numbering = bool(element.xpath('.//w:numPr', namespaces=namespaces))
-            full_text = ""
-            runs = element.xpath('.//w:r', namespaces=namespaces)
-            for run in runs:
-                text_nodes = run.xpath('.//w:t', namespaces=namespaces)
-                for text_node in text_nodes:
-                    full_text += text_node.text if text_node.text else ""
+        if element_tag == _W_P:
+            is_heading = bool(_HEADING_XP(element))
+            has_numbering = bool(_NUMPR_XP(element))
+            full_text = _element_text(element)
             
             numbering_style = None
             if has_numbering:
-                numbering_props = element.xpath('.//w:numPr', namespaces=namespaces)
+                numbering_props = _NUMPR_XP(element)
                 if numbering_props:
                     numbering_style = etree.tostring(numbering_props[0], encoding='unicode')
             
@@ -58,36 +116,19 @@ def extract_word_content_to_json(file_path):
                     "has_numbering": has_numbering,
                     "numbering_style": numbering_style,
                     "element_index": element_index,
-                    "value": full_text.replace("\n", "␊").replace("\r", "␍")
+                    "value": full_text.translate(NL_ENCODE)
                 })
         # Process for sheet in Word
-        elif element_type == 'tbl':
+        elif element_tag == _W_TBL:
             table_cells = []
-            rows = element.xpath('.//w:tr', namespaces=namespaces)
+            rows = _TR_XP(element)
             
             # Table processing remains the same
             for row_idx, row in enumerate(rows):
-                cells = row.xpath('.//w:tc', namespaces=namespaces)
+                cells = _TC_XP(row)
                 
                 for cell_idx, cell in enumerate(cells):
-                    cell_text = ""
-                    
-                    cell_paragraphs = cell.xpath('.//w:p', namespaces=namespaces)
-                    for cell_para_idx, cell_paragraph in enumerate(cell_paragraphs):
-                        para_text = ""
-                        cell_runs = cell_paragraph.xpath('.//w:r', namespaces=namespaces)
-                        
-                        for cell_run in cell_runs:
-                            cell_text_nodes = cell_run.xpath('.//w:t', namespaces=namespaces)
-                            for cell_text_node in cell_text_nodes:
-                                para_text += cell_text_node.text if cell_text_node.text else ""
-                        
-                        if para_text:
-                            cell_text += para_text
-                            if cell_para_idx < len(cell_paragraphs) - 1:
-                                cell_text += "\n"
-                    
-                    cell_text = cell_text.strip()
+                    cell_text = _cell_text(cell)
                     if cell_text and should_translate(cell_text):
                         item_id += 1
                         table_cells.append({
@@ -97,27 +138,21 @@ def extract_word_content_to_json(file_path):
                             "table_index": element_index,
                             "row": row_idx,
                             "col": cell_idx,
-                            "value": cell_text.replace("\n", "␊").replace("\r", "␍")
+                            "value": cell_text.translate(NL_ENCODE)
                         })
             
             content_data.extend(table_cells)
     
     # Headers and footers processing remains the same
     for hf_file, hf_xml in header_footer_content.items():
-        hf_tree = etree.fromstring(hf_xml)
+        hf_tree = etree.fromstring(hf_xml, _PARSER)
         hf_type = "header" if "header" in hf_file else "footer"
         hf_number = os.path.basename(hf_file).split('.')[0]  # Extract header1, footer2, etc.
         
         # Process paragraphs in header/footer
-        hf_paragraphs = hf_tree.xpath('.//w:p', namespaces=namespaces)
+        hf_paragraphs = _P_XP(hf_tree)
         for p_idx, paragraph in enumerate(hf_paragraphs):
-            paragraph_text = ""
-            runs = paragraph.xpath('.//w:r', namespaces=namespaces)
-            
-            for run in runs:
-                text_nodes = run.xpath('.//w:t', namespaces=namespaces)
-                for text_node in text_nodes:
-                    paragraph_text += text_node.text if text_node.text else ""
+            paragraph_text = _element_text(paragraph)
             
             if paragraph_text and should_translate(paragraph_text):
                 item_id += 1
@@ -129,36 +164,19 @@ def extract_word_content_to_json(file_path):
                     "hf_file": hf_file,
                     "hf_number": hf_number,
                     "paragraph_index": p_idx,
-                    "value": paragraph_text.replace("\n", "␊").replace("\r", "␍")
+                    "value": paragraph_text.translate(NL_ENCODE)
                 })
         
         # Process tables in header/footer
-        hf_tables = hf_tree.xpath('.//w:tbl', namespaces=namespaces)
+        hf_tables = _TBL_XP(hf_tree)
         for tbl_idx, table in enumerate(hf_tables):
-            rows = table.xpath('.//w:tr', namespaces=namespaces)
+            rows = _TR_XP(table)
             
             for row_idx, row in enumerate(rows):
-                cells = row.xpath('.//w:tc', namespaces=namespaces)
+                cells = _TC_XP(row)
                 
                 for cell_idx, cell in enumerate(cells):
-                    cell_text = ""
-                    
-                    cell_paragraphs = cell.xpath('.//w:p', namespaces=namespaces)
-                    for cell_para_idx, cell_paragraph in enumerate(cell_paragraphs):
-                        para_text = ""
-                        cell_runs = cell_paragraph.xpath('.//w:r', namespaces=namespaces)
-                        
-                        for cell_run in cell_runs:
-                            cell_text_nodes = cell_run.xpath('.//w:t', namespaces=namespaces)
-                            for cell_text_node in cell_text_nodes:
-                                para_text += cell_text_node.text if cell_text_node.text else ""
-                        
-                        if para_text:
-                            cell_text += para_text
-                            if cell_para_idx < len(cell_paragraphs) - 1:
-                                cell_text += "\n"
-                    
-                    cell_text = cell_text.strip()
+                    cell_text = _cell_text(cell)
                     if cell_text and should_translate(cell_text):
                         item_id += 1
                         content_data.append({
@@ -171,218 +189,252 @@ def extract_word_content_to_json(file_path):
                             "table_index": tbl_idx,
                             "row": row_idx,
                             "col": cell_idx,
-                            "value": cell_text.replace("\n", "␊").replace("\r", "␍")
+                            "value": cell_text.translate(NL_ENCODE)
                         })
 
     filename = os.path.splitext(os.path.basename(file_path))[0]
     temp_folder = os.path.join("temp", filename)
     os.makedirs(temp_folder, exist_ok=True)
-    json_path = os.path.join(temp_folder, "src.json")
-    with open(json_path, "w", encoding="utf-8") as json_file:
-        json.dump(content_data, json_file, ensure_ascii=False, indent=4)
 
     app_logger.info(f"Extracted {len(content_data)} content items from document: {filename}")
+    return content_data, temp_folder
+
+def save_word_content_json(content_data, temp_folder):
+    """
+    Write extracted items to src.json in the temp folder.
+    Returns:
+        Path of the written JSON file
+    """
+    json_path = os.path.join(temp_folder, "src.json")
+    write_json(json_path, content_data)
     return json_path
 
+def extract_word_content_to_json(file_path):
+    content_data, temp_folder = extract_word_content(file_path)
+    return save_word_content_json(content_data, temp_folder)
 
-def write_translated_content_to_word(file_path, original_json_path, translated_json_path):
-    with open(original_json_path, "r", encoding="utf-8") as original_file:
-        original_data = json.load(original_file)
-    
-    with open(translated_json_path, "r", encoding="utf-8") as translated_file:
-        translated_data = json.load(translated_file)
-
-    translations = {}
-    for item in translated_data:
-        item_id = str(item.get("id", item.get("count")))
-        if item_id and "translated" in item:
-            translations[item_id] = item["translated"]
-    
-    with ZipFile(file_path, 'r') as docx:
-        document_xml = docx.read('word/document.xml')
-        
-        # Get all header and footer files
-        header_footer_files = {}
-        for name in docx.namelist():
-            if name.startswith('word/header') or name.startswith('word/footer'):
-                header_footer_files[name] = docx.read(name)
 
-    namespaces = {'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'}
-    document_tree = etree.fromstring(document_xml)
-    
-    # Parse all header/footer XML trees
-    header_footer_trees = {}
-    for hf_file, hf_content in header_footer_files.items():
-        header_footer_trees[hf_file] = etree.fromstring(hf_content)
-    
-    block_elements = document_tree.xpath('.//*[self::w:p or self::w:tbl]', namespaces=namespaces)
+def _apply_translations(document_tree, header_footer_trees, original_data, translations):
+    """
+    Write the translated text of every extracted item into the parsed document and header/footer trees.
+    translations maps item ids to translated text.
+    """
+    block_elements = _BLOCKS_XP(document_tree)
 
-    # Handle paragraphs and table cells in main document
+    # Step 1: Resolve translations and group the items by the block or header/footer file they update.
+    # Groups keep the order of first appearance, which is document order, so table cells are still
+    # written before the paragraphs nested inside them
+    block_items = defaultdict(list)
+    hf_items = defaultdict(list)
     for item in original_data:
-        item_id = str(item.get("id", item.get("count")))
+        item_id = item.get("id", item.get("count"))
         translated_text = translations.get(item_id)
         
         if not translated_text:
             app_logger.warning(f"No translation found for item ID {item_id}")
             continue
             
-        translated_text = translated_text.replace("␊", "\n").replace("␍", "\r")
+        translated_text = translated_text.translate(NL_DECODE)
         
-        if item["type"] == "paragraph":
-            try:
-                element_index = item.get("element_index")
-                if element_index is None or element_index >= len(block_elements):
-                    app_logger.error(f"Invalid element index: {element_index}")
-                    continue
+        item_type = item["type"]
+        if item_type == "paragraph":
+            block_items[(item_type, item.get("element_index"))].append((item, translated_text))
+        elif item_type == "table_cell":
+            block_items[(item_type, item.get("table_index"))].append((item, translated_text))
+        elif item_type in ("header_footer", "header_footer_table_cell"):
+            hf_items[item.get("hf_file")].append((item, translated_text))
+
+    # Step 2: Handle paragraphs and table cells in main document, touching each block once
+    for (item_type, block_index), items in block_items.items():
+        if item_type == "paragraph":
+            for item, translated_text in items:
+                try:
+                    if block_index is None or block_index >= len(block_elements):
+                        app_logger.error(f"Invalid element index: {block_index}")
+                        continue
                     
-                paragraph = block_elements[element_index]
+                    paragraph = block_elements[block_index]
                 
-                if paragraph.tag.split('}')[-1] != 'p':
-                    app_logger.error(f"Element at index {element_index} is not a paragraph")
-                    continue
+                    if paragraph.tag != _W_P:
+                        app_logger.error(f"Element at index {block_index} is not a paragraph")
+                        continue
                 
-                update_paragraph_text_with_formatting(paragraph, translated_text, namespaces, item.get("has_numbering", False))
+                    update_paragraph_text_with_formatting(paragraph, translated_text, NAMESPACES, item.get("has_numbering", False))
                     
-            except (IndexError, TypeError) as e:
-                app_logger.error(f"Error finding paragraph with index {item.get('element_index')}: {e}")
+                except (IndexError, TypeError) as e:
+                    app_logger.error(f"Error finding paragraph with index {block_index}: {e}")
                 
-        elif item["type"] == "table_cell":
+        else:
             try:
-                table_index = item.get("table_index")
-                if table_index is None or table_index >= len(block_elements):
-                    app_logger.error(f"Invalid table index: {table_index}")
+                if block_index is None or block_index >= len(block_elements):
+                    app_logger.error(f"Invalid table index: {block_index}")
                     continue
                 
-                table = block_elements[table_index]
+                table = block_elements[block_index]
                 
-                if table.tag.split('}')[-1] != 'tbl':
-                    app_logger.error(f"Element at index {table_index} is not a table")
+                if table.tag != _W_TBL:
+                    app_logger.error(f"Element at index {block_index} is not a table")
                     continue
                 
-                row_idx = item.get("row")
-                col_idx = item.get("col")
-                
-                rows = table.xpath('.//w:tr', namespaces=namespaces)
-                if row_idx >= len(rows):
-                    app_logger.error(f"Row index {row_idx} out of bounds")
-                    continue
-                    
-                row = rows[row_idx]
-                cells = row.xpath('.//w:tc', namespaces=namespaces)
-                
-                if col_idx >= len(cells):
-                    app_logger.error(f"Column index {col_idx} out of bounds")
-                    continue
-                    
-                cell = cells[col_idx]
-                update_table_cell_text(cell, translated_text, namespaces)
-                    
             except (IndexError, TypeError) as e:
                 app_logger.error(f"Error finding table cell: {e}")
+                continue
+            
+            _update_table_cells(table, items)
+    
+    # Step 3: Handle header and footer content, looking up each file's paragraphs and tables once
+    for hf_file, items in hf_items.items():
+        if hf_file not in header_footer_trees:
+            app_logger.error(f"Header/footer file not found: {hf_file}")
+            continue
         
-        # Handle header and footer content
-        elif item["type"] == "header_footer":
-            try:
-                hf_file = item.get("hf_file")
-                if hf_file not in header_footer_trees:
-                    app_logger.error(f"Header/footer file not found: {hf_file}")
-                    continue
-                
-                hf_tree = header_footer_trees[hf_file]
-                p_idx = item.get("paragraph_index")
-                
-                paragraphs = hf_tree.xpath('.//w:p', namespaces=namespaces)
-                if p_idx >= len(paragraphs):
-                    app_logger.error(f"Paragraph index {p_idx} out of bounds in {hf_file}")
-                    continue
-                
-                paragraph = paragraphs[p_idx]
-                update_paragraph_text_with_formatting(paragraph, translated_text, namespaces, False)
-                
-            except (IndexError, TypeError) as e:
-                app_logger.error(f"Error updating header/footer paragraph: {e}")
+        hf_tree = header_footer_trees[hf_file]
+        paragraphs = None
+        tables = None
+        table_cell_items = defaultdict(list)
         
-        elif item["type"] == "header_footer_table_cell":
+        for item, translated_text in items:
+            if item["type"] == "header_footer":
+                try:
+                    p_idx = item.get("paragraph_index")
+                    if paragraphs is None:
+                        paragraphs = _P_XP(hf_tree)
+                    if p_idx >= len(paragraphs):
+                        app_logger.error(f"Paragraph index {p_idx} out of bounds in {hf_file}")
+                        continue
+                    
+                    update_paragraph_text_with_formatting(paragraphs[p_idx], translated_text, NAMESPACES, False)
+                    
+                except (IndexError, TypeError) as e:
+                    app_logger.error(f"Error updating header/footer paragraph: {e}")
+            else:
+                table_cell_items[item.get("table_index")].append((item, translated_text))
+        
+        for tbl_idx, cell_items in table_cell_items.items():
             try:
-                hf_file = item.get("hf_file")
-                if hf_file not in header_footer_trees:
-                    app_logger.error(f"Header/footer file not found: {hf_file}")
-                    continue
-                
-                hf_tree = header_footer_trees[hf_file]
-                tbl_idx = item.get("table_index")
-                row_idx = item.get("row")
-                col_idx = item.get("col")
-                
-                tables = hf_tree.xpath('.//w:tbl', namespaces=namespaces)
+                if tables is None:
+                    tables = _TBL_XP(hf_tree)
                 if tbl_idx >= len(tables):
                     app_logger.error(f"Table index {tbl_idx} out of bounds in {hf_file}")
                     continue
                 
                 table = tables[tbl_idx]
-                rows = table.xpath('.//w:tr', namespaces=namespaces)
-                
-                if row_idx >= len(rows):
-                    app_logger.error(f"Row index {row_idx} out of bounds in table in {hf_file}")
-                    continue
-                
-                row = rows[row_idx]
-                cells = row.xpath('.//w:tc', namespaces=namespaces)
-                
-                if col_idx >= len(cells):
-                    app_logger.error(f"Column index {col_idx} out of bounds in table in {hf_file}")
-                    continue
-                
-                cell = cells[col_idx]
-                update_table_cell_text(cell, translated_text, namespaces)
                 
             except (IndexError, TypeError) as e:
                 app_logger.error(f"Error updating header/footer table cell: {e}")
+                continue
+            
+            _update_table_cells(table, cell_items, f" in table in {hf_file}")
 
-    # Create temp directory structure
-    temp_folder = "temp"
-    os.makedirs(temp_folder, exist_ok=True)
-    temp_word_folder = os.path.join(temp_folder, "word")
-    os.makedirs(temp_word_folder, exist_ok=True)
-    
-    # Write modified main document
-    modified_doc_path = os.path.join(temp_word_folder, "document.xml")
-    with open(modified_doc_path, "wb") as modified_doc:
-        modified_doc.write(etree.tostring(document_tree, xml_declaration=True, encoding="UTF-8", standalone="yes"))
-    
-    # Write modified header and footer files
-    header_footer_paths = {}
-    for hf_file, hf_tree in header_footer_trees.items():
-        file_name = os.path.basename(hf_file)
-        modified_hf_path = os.path.join(temp_word_folder, file_name)
-        with open(modified_hf_path, "wb") as modified_hf:
-            modified_hf.write(etree.tostring(hf_tree, xml_declaration=True, encoding="UTF-8", standalone="yes"))
-        header_footer_paths[hf_file] = modified_hf_path
+def _parse_part(content):
+    """Parse one XML part with its own copy of the shared parser, lxml locks a parser while it is in use."""
+    return etree.fromstring(content, _PARSER.copy())
 
+def _serialize_part(tree):
+    """Serialize a modified XML part for the result archive."""
+    return etree.tostring(tree, xml_declaration=True, encoding="UTF-8", standalone="yes")
+
+def _map_parts(func, values):
+    """
+    Apply func to every header/footer part, in a thread pool when there are many of them.
+    lxml releases the GIL while parsing and serializing, so the threads run in parallel.
+    Returns:
+        List of results in input order
+    """
+    if len(values) > PARALLEL_PART_THRESHOLD:
+        with ThreadPoolExecutor() as executor:
+            return list(executor.map(func, values))
+    return [func(value) for value in values]
+
+def write_translated_content_to_word(file_path, original_json_path, translated_json_path, original_data=None):
+    # Items already in memory from extract_word_content skip reloading src.json
+    if original_data is None:
+        original_data = read_json(original_json_path)
+    translated_data = read_json(translated_json_path)
+
+    # Ids are ints on both sides, so they are used as keys as-is
+    translations = {item.get("id", item.get("count")): item["translated"]
+                    for item in translated_data if "translated" in item}
+    
     # Create result file
     result_folder = "result"
     os.makedirs(result_folder, exist_ok=True)
     result_path = os.path.join(result_folder, f"{os.path.splitext(os.path.basename(file_path))[0]}_translated.docx")
 
-    with ZipFile(file_path, 'r') as original_doc:
-        with ZipFile(result_path, 'w') as new_doc:
-            for item in original_doc.infolist():
-                # Skip the files we've modified
-                if item.filename == 'word/document.xml' or item.filename in header_footer_paths:
+    # The source archive is opened once: parts are parsed from it and the result is copied from it
+    with ZipFile(file_path, 'r') as docx:
+        document_tree = etree.fromstring(docx.read('word/document.xml'), _PARSER)
+        
+        # Parse only the header/footer parts that have items to write, the rest are copied as raw bytes
+        modified_hf_files = {item.get("hf_file") for item in original_data
+                             if item["type"] in ("header_footer", "header_footer_table_cell")}
+        header_footer_files = [name for name in docx.namelist()
+                               if (name.startswith('word/header') or name.startswith('word/footer'))
+                               and name in modified_hf_files]
+        header_footer_trees = dict(zip(header_footer_files, _map_parts(_parse_part, [docx.read(name) for name in header_footer_files])))
+        
+        _apply_translations(document_tree, header_footer_trees, original_data, translations)
+
+        serialized_parts = dict(zip(header_footer_trees, _map_parts(_serialize_part, list(header_footer_trees.values()))))
+
+        # Write modified parts straight into the result archive, no temp files
+        with ZipFile(result_path, 'w', compression=ZIP_DEFLATED, compresslevel=OUTPUT_COMPRESSLEVEL) as new_doc:
+            for item in docx.infolist():
+                if item.filename == 'word/document.xml':
+                    # Stream the main document straight into the deflate stream, without an intermediate bytes copy
+                    document_info = ZipInfo(item.filename, date_time=item.date_time)
+                    document_info.compress_type = ZIP_DEFLATED
+                    with new_doc.open(document_info, 'w', force_zip64=True) as document_file:
+                        etree.ElementTree(document_tree).write(document_file, xml_declaration=True, encoding="UTF-8", standalone=True)
                     continue
-                new_doc.writestr(item, original_doc.read(item.filename))
-            
-            # Add modified files
-            new_doc.write(modified_doc_path, 'word/document.xml')
-            for hf_file, hf_path in header_footer_paths.items():
-                new_doc.write(hf_path, hf_file)
+                
+                if item.filename in serialized_parts:
+                    data = serialized_parts[item.filename]
+                else:
+                    data = docx.read(item.filename)
+                
+                # Deflate XML parts, store media that is already compressed
+                if item.filename.lower().endswith(PRECOMPRESSED_EXTENSIONS):
+                    new_doc.writestr(item, data, compress_type=ZIP_STORED)
+                else:
+                    new_doc.writestr(item, data, compress_type=ZIP_DEFLATED, compresslevel=OUTPUT_COMPRESSLEVEL)
 
     app_logger.info(f"Translated Word document saved to: {result_path}")
     return result_path
 
+def _update_table_cells(table, cell_items, location=""):
+    """
+    Write translated cells into one table, looking up its rows once and each row's cells once.
+    cell_items holds (item, translated_text) pairs; location is appended to log messages.
+    """
+    rows = _TR_XP(table)
+    cells_by_row = {}
+    
+    for item, translated_text in cell_items:
+        try:
+            row_idx = item.get("row")
+            col_idx = item.get("col")
+            
+            if row_idx >= len(rows):
+                app_logger.error(f"Row index {row_idx} out of bounds{location}")
+                continue
+            
+            cells = cells_by_row.get(row_idx)
+            if cells is None:
+                cells = cells_by_row[row_idx] = _TC_XP(rows[row_idx])
+            
+            if col_idx >= len(cells):
+                app_logger.error(f"Column index {col_idx} out of bounds{location}")
+                continue
+            
+            update_table_cell_text(cells[col_idx], translated_text, NAMESPACES)
+            
+        except (IndexError, TypeError) as e:
+            app_logger.error(f"Error updating table cell{location}: {e}")
+
 def update_paragraph_text_with_formatting(paragraph, new_text, namespaces, has_numbering=False):
     # Get all runs in the paragraph
-    runs = paragraph.xpath('.//w:r', namespaces=namespaces)
+    runs = _R_XP(paragraph)
     
     if not runs:
         # If no runs exist, create a new one
@@ -395,21 +447,17 @@ def update_paragraph_text_with_formatting(paragraph, new_text, namespaces, has_n
     formatting_elements = {}
     for i, run in enumerate(runs):
         # Collect formatting elements from each run (bold, italic, etc.)
-        formats = run.xpath('./w:rPr/*', namespaces=namespaces)
+        formats = _RPR_CHILDREN_XP(run)
         if formats:
             formatting_elements[i] = formats
     
-    # Clear all existing text nodes
-    text_nodes = []
-    for run in runs:
-        for t in run.xpath('.//w:t', namespaces=namespaces):
-            t.getparent().remove(t)
+    # Clear all existing text nodes in one call
+    etree.strip_elements(paragraph, _W_T)
     
     # Special handling for paragraphs with numbering
     if has_numbering:
         # Try to detect numbering pattern in text
-        import re
-        numbering_match = re.match(r'^(\d+[\.\)]|\w+[\.\)]|\•|\-|\*)\s+(.*)$', new_text)
+        numbering_match = _NUMBERING_RE.match(new_text)
         
         if numbering_match and len(runs) > 1:
             # If numbering pattern detected, split content
@@ -435,18 +483,12 @@ def update_paragraph_text_with_formatting(paragraph, new_text, namespaces, has_n
         # For regular paragraphs, put translated text in first run
         new_text_node = etree.SubElement(runs[0], f"{{{namespaces['w']}}}t")
         new_text_node.text = new_text
-        
-        # Clear text nodes in other runs
-        for i in range(1, len(runs)):
-            for t in runs[i].xpath('.//w:t', namespaces=namespaces):
-                if t.getparent() is not None:
-                    t.getparent().remove(t)
     
     # Restore formatting elements
     for run_idx, formats in formatting_elements.items():
         if run_idx < len(runs):
             # Get or create rPr element
-            rPr_elements = runs[run_idx].xpath('./w:rPr', namespaces=namespaces)
+            rPr_elements = _RPR_XP(runs[run_idx])
             if rPr_elements:
                 rPr = rPr_elements[0]
             else:
@@ -455,22 +497,17 @@ def update_paragraph_text_with_formatting(paragraph, new_text, namespaces, has_n
             # Add formatting elements
             for format_elem in formats:
                 # Clone the format element
-                cloned_format = etree.fromstring(etree.tostring(format_elem))
+                cloned_format = deepcopy(format_elem)
                 rPr.append(cloned_format)
 
 def update_table_cell_text(cell, new_text, namespaces):
-    cell_paragraphs = cell.xpath('.//w:p', namespaces=namespaces)
+    cell_paragraphs = _P_XP(cell)
     
     if cell_paragraphs:
         first_paragraph = cell_paragraphs[0]
         
         # Clear all text in cell paragraphs
-        for p in cell_paragraphs:
-            runs = p.xpath('.//w:r', namespaces=namespaces)
-            for run in runs:
-                text_nodes = run.xpath('.//w:t', namespaces=namespaces)
-                for text_node in text_nodes:
-                    text_node.text = ""
+        etree.strip_elements(cell, _W_T)
         
         if "\n" in new_text:
             paragraph_texts = new_text.split("\n")
@@ -492,23 +529,23 @@ def update_table_cell_text(cell, new_text, namespaces):
         new_text_node.text = new_text
 
 
-def update_json_structure_after_translation(original_json_path, translated_json_path):
-    with open(original_json_path, "r", encoding="utf-8") as orig_file:
-        original_data = json.load(orig_file)
+def update_json_structure_after_translation(original_json_path, translated_json_path, original_data=None):
+    translated_data = read_json(translated_json_path)
+    
+    # Already restructured, skip loading the original and rewriting the file
+    if all(item.keys() == _RESTRUCTURED_KEYS for item in translated_data):
+        app_logger.info(f"Translation JSON already matches original structure: {translated_json_path}")
+        return translated_json_path
     
-    with open(translated_json_path, "r", encoding="utf-8") as trans_file:
-        translated_data = json.load(trans_file)
+    if original_data is None:
+        original_data = read_json(original_json_path)
     
-    translations_by_id = {}
-    for item in translated_data:
-        if "translated" in item:
-            item_id = str(item.get("id", item.get("count")))
-            if item_id:
-                translations_by_id[item_id] = item["translated"]
+    translations_by_id = {item.get("id", item.get("count")): item["translated"]
+                          for item in translated_data if "translated" in item}
     
     restructured_data = []
     for item in original_data:
-        item_id = str(item.get("id", item.get("count")))
+        item_id = item.get("id", item.get("count"))
         if item_id in translations_by_id:
             restructured_data.append({
                 "id": item.get("id"),
@@ -517,8 +554,7 @@ def update_json_structure_after_translation(original_json_path, translated_json_
                 "translated": translations_by_id[item_id]
             })
     
-    with open(translated_json_path, "w", encoding="utf-8") as outfile:
-        json.dump(restructured_data, outfile, ensure_ascii=False, indent=4)
+    write_json(translated_json_path, restructured_data)
     
     app_logger.info(f"Updated translation JSON structure to match original: {translated_json_path}")
     return translated_json_path
\ No newline at end of file
@@ -0,0 +1,2 @@
+# Deflate level for translated Office archives, favouring speed over the last few percent of size
+OUTPUT_COMPRESSLEVEL = 6
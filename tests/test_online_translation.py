@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("httpx")
+
+from llmWrapper import online_translation
+
+
+class _RecordingThinkPattern:
+    """Stands in for _RE_THINK and records every sub() call."""
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.calls = 0
+
+    def sub(self, repl, text):
+        self.calls += 1
+        return self.pattern.sub(repl, text)
+
+
+def _fake_client(content):
+    message = SimpleNamespace(content=content)
+    response = SimpleNamespace(choices=[SimpleNamespace(message=message)])
+    create = lambda **params: response
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+@pytest.fixture
+def think_pattern(monkeypatch):
+    pattern = _RecordingThinkPattern(online_translation._RE_THINK)
+    monkeypatch.setattr(online_translation, "_RE_THINK", pattern)
+    monkeypatch.setattr(
+        online_translation, "load_model_config",
+        lambda model: {"base_url": "http://localhost", "model": "test-model"}
+    )
+    return pattern
+
+
+def test_online_response_without_think_tag_skips_stripper(think_pattern, monkeypatch):
+    monkeypatch.setattr(online_translation, "_get_client", lambda api_key, base_url: _fake_client('{"1": "Hallo"}'))
+
+    outcome = online_translation.translate_online("key", [], "test")
+
+    assert outcome.ok
+    assert outcome.result == '{"1": "Hallo"}'
+    assert think_pattern.calls == 0
+
+
+def test_online_response_with_think_tag_is_stripped(think_pattern, monkeypatch):
+    content = '<think>reasoning</think>{"1": "Hallo"}'
+    monkeypatch.setattr(online_translation, "_get_client", lambda api_key, base_url: _fake_client(content))
+
+    outcome = online_translation.translate_online("key", [], "test")
+
+    assert outcome.ok
+    assert outcome.result == '{"1": "Hallo"}'
+    assert think_pattern.calls == 1
@@ -2,7 +2,9 @@ import os
 import shutil
 import json
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+from itertools import islice
 from threading import Lock
 from config.log_config import app_logger
 from .calculation_tokens import num_tokens_from_string
@@ -23,6 +25,14 @@ FAILED_JSON_PATH = "dst_translated_failed.json"
 RESULT_JSON_PATH = "dst_translated.json"
 MAX_PREVIOUS_TOKENS = 128
 
+# Segments queued per worker thread; submission stays bounded instead of queueing the whole document
+PENDING_SEGMENTS_PER_THREAD = 2
+
+@lru_cache(maxsize=1024)
+def _cached_num_tokens(text):
+    """num_tokens_from_string memoized by text, so repeated context values are not re-tokenized."""
+    return num_tokens_from_string(text)
+
 class DocumentTranslator:
     def __init__(self, input_file_path, model, use_online, api_key, src_lang, dst_lang, continue_mode, max_token, max_retries, thread_count, glossary_path):
         self.input_file_path = input_file_path
@@ -38,6 +48,9 @@ class DocumentTranslator:
         self.glossary_path = glossary_path
         self.num_threads = thread_count
         self.lock = Lock()
+        # Failed segments are collected in memory and written to the failed list file in one go
+        self.failed_segments = []
+        self.failed_lock = Lock()
         self.check_stop_requested = None
         self.last_ui_update_time = 0
 
@@ -156,7 +169,7 @@ class DocumentTranslator:
             # Set retry limits
             max_retry_time = 3600  # 1 hour for network errors
             max_empty_retries = 1  # 2 retries for empty results
-            start_time = time.time()
+            start_time = time.monotonic()
             retry_count = 0
             empty_result_count = 0
             
@@ -169,15 +182,22 @@ class DocumentTranslator:
                         current_previous = self.previous_content
                     
                     # Try translation with check_stop_callback
-                    translated_text, success = translate_text(
+                    outcome = translate_text(
                         segment, current_previous, self.model, self.use_online, self.api_key,
                         self.system_prompt, self.user_prompt, self.previous_prompt, self.glossary_prompt, 
                         current_glossary_terms, check_stop_callback=self.check_for_stop
                     )
+                    translated_text = outcome.result
                     # Handle different failure cases
-                    if not success:
+                    if not outcome.ok:
+                        # Configuration/authentication error - retrying will not help
+                        if outcome.error_kind == "fatal":
+                            app_logger.error(f"Segment translation failed: {outcome.result}. Marking as failed.")
+                            self._mark_segment_as_failed(segment)
+                            return None
+                        
                         # Network/API error - use time-based retry
-                        elapsed_time = time.time() - start_time
+                        elapsed_time = time.monotonic() - start_time
                         remaining_time = max_retry_time - elapsed_time
                         
                         if remaining_time <= 0:
@@ -228,7 +248,7 @@ class DocumentTranslator:
                 
                 except Exception as e:
                     # Exception - use time-based retry for network issues
-                    elapsed_time = time.time() - start_time
+                    elapsed_time = time.monotonic() - start_time
                     remaining_time = max_retry_time - elapsed_time
                     
                     if remaining_time <= 0:
@@ -240,19 +260,15 @@ class DocumentTranslator:
                     interruptible_sleep(min(1, remaining_time), self.check_for_stop)
                     continue
 
-        # Use thread pool for translation
-        with ThreadPoolExecutor(max_workers=self.num_threads) as executor:
-            futures = []
-            for seg in all_segments:
-                future = executor.submit(process_segment, seg)
-                futures.append(future)
-            
-            if not self.continue_mode:
-                self.update_ui_safely(progress_callback, 0.0, f"Translating...")
-            
-            current_batch_completed = 0
-            
-            for future in as_completed(futures):
+        # Use thread pool for translation. Each segment already packs as many lines as fit in max_token
+        # (see stream_segment_json), so one request per segment is the largest batch the limit allows
+        if not self.continue_mode:
+            self.update_ui_safely(progress_callback, 0.0, f"Translating...")
+        
+        current_batch_completed = 0
+        
+        try:
+            for future in self._iter_completed(process_segment, all_segments):
                 try:
                     future.result()
                 except Exception as e:
@@ -275,6 +291,8 @@ class DocumentTranslator:
                     p = current_batch_completed / total_current_batch
                     app_logger.info(f"Progress: {p:.2%}")
                     self.update_ui_safely(progress_callback, p, f"Translating...")
+        finally:
+            self._flush_failed_segments()
 
     def retranslate_failed_content(self, retry_count, max_retries, progress_callback, last_try=False):
         self.check_for_stop()
@@ -377,7 +395,7 @@ class DocumentTranslator:
             # Set retry limits
             max_retry_time = 3600  # 1 hour for network errors
             max_empty_retries = 1  # 1 retries for empty results
-            start_time = time.time()
+            start_time = time.monotonic()
             retry_count = 0
             empty_result_count = 0
             
@@ -390,16 +408,23 @@ class DocumentTranslator:
                         current_previous = self.previous_content
                     
                     # Try translation with check_stop_callback
-                    translated_text, success = translate_text(
+                    outcome = translate_text(
                         segment, current_previous, self.model, self.use_online, self.api_key,
                         self.system_prompt, self.user_prompt, self.previous_prompt, self.glossary_prompt, 
                         current_glossary_terms, check_stop_callback=self.check_for_stop
                     )
+                    translated_text = outcome.result
 
                     # Handle different failure cases
-                    if not success:
+                    if not outcome.ok:
+                        # Configuration/authentication error - retrying will not help
+                        if outcome.error_kind == "fatal":
+                            app_logger.error(f"Failed segment translation failed: {outcome.result}. Keeping in failed list.")
+                            self._mark_segment_as_failed(segment)
+                            return None
+                        
                         # Network/API error - use time-based retry
-                        elapsed_time = time.time() - start_time
+                        elapsed_time = time.monotonic() - start_time
                         remaining_time = max_retry_time - elapsed_time
                         
                         if remaining_time <= 0:
@@ -454,7 +479,7 @@ class DocumentTranslator:
                 
                 except Exception as e:
                     # Exception - use time-based retry for network issues
-                    elapsed_time = time.time() - start_time
+                    elapsed_time = time.monotonic() - start_time
                     remaining_time = max_retry_time - elapsed_time
                     
                     if remaining_time <= 0:
@@ -467,18 +492,13 @@ class DocumentTranslator:
                     continue
 
         # Use thread pool for retry translation
-        with ThreadPoolExecutor(max_workers=self.num_threads) as executor:
-            futures = []
-            for seg in all_failed_segments:
-                future = executor.submit(process_failed_segment, seg, last_try)
-                futures.append(future)
-            
-            self.update_ui_safely(progress_callback, 0.0, f"{retry_desc}...")
-            
-            completed = 0
-            failed_count = 0
-            
-            for future in as_completed(futures):
+        self.update_ui_safely(progress_callback, 0.0, f"{retry_desc}...")
+        
+        completed = 0
+        failed_count = 0
+        
+        try:
+            for future in self._iter_completed(process_failed_segment, all_failed_segments, last_try):
                 try:
                     result = future.result()
                     if result is None:
@@ -496,6 +516,8 @@ class DocumentTranslator:
                     p, 
                     f"{retry_desc}...{retry_count+1}/{max_retries}"
                 )
+        finally:
+            self._flush_failed_segments()
 
         self.update_ui_safely(progress_callback, 1.0, f"{retry_desc} completed.")
         
@@ -511,6 +533,26 @@ class DocumentTranslator:
         
         return False
 
+    def _iter_completed(self, worker, segments, *args):
+        """
+        Run worker(segment, *args) for every segment on a pool of self.num_threads threads and
+        yield the futures as they complete. Only PENDING_SEGMENTS_PER_THREAD segments per thread are
+        queued at a time, so stopping mid-document leaves just a few queued tasks to drain.
+        """
+        max_workers = max(1, self.num_threads or 1)
+        segment_iter = iter(segments)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = {executor.submit(worker, segment, *args)
+                       for segment in islice(segment_iter, max_workers * PENDING_SEGMENTS_PER_THREAD)}
+            
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                # Refill the queue before handing results out
+                for segment in islice(segment_iter, len(done)):
+                    pending.add(executor.submit(worker, segment, *args))
+                yield from done
+
     def _update_previous_content(self, translated_text_dict, previous_content, max_tokens):
         """Update context, keeping most recent translated segments within token limit"""
         if not translated_text_dict:
@@ -526,7 +568,9 @@ class DocumentTranslator:
         if len(valid_items) > 3:
             valid_items = valid_items[-3:]
         
-        total_tokens = sum(num_tokens_from_string(v) for _, v in valid_items)
+        # Tokenize each value once and reuse the counts for the total and the trimming below
+        token_counts = [_cached_num_tokens(v) for _, v in valid_items]
+        total_tokens = sum(token_counts)
         
         if total_tokens > max_tokens and len(valid_items) == 1:
             app_logger.info(f"Single paragraph exceeds token limit: {total_tokens} tokens > {max_tokens}")
@@ -536,10 +580,7 @@ class DocumentTranslator:
             final_items = []
             current_tokens = 0
             
-            for item in reversed(valid_items):
-                k, v = item
-                v_tokens = num_tokens_from_string(v)
-                
+            for item, v_tokens in zip(reversed(valid_items), reversed(token_counts)):
                 if current_tokens + v_tokens > max_tokens:
                     if not final_items:
                         app_logger.info(f"Cannot fit any paragraph within token limit")
@@ -577,48 +618,48 @@ class DocumentTranslator:
             os.makedirs(temp_folder,exist_ok=True)
     
     def _mark_segment_as_failed(self, segment):
-        """Mark segment as failed and add to failed list"""
+        """Mark segment as failed and add it to the in-memory failed list"""
         app_logger.debug(f"Marking segment as failed")
         
-        # Ensure file exists first (without lock)
-        if not os.path.exists(self.failed_json_path):
+        try:
+            clean_segment = clean_json(segment)
+            segment_dict = json.loads(clean_segment)
+        except json.JSONDecodeError as e:
+            app_logger.error(f"Failed to decode JSON segment: {segment}. Error: {e}")
+            return
+        
+        failed_items = [{"count": int(count), "value": value.strip()} for count, value in segment_dict.items()]
+        with self.failed_lock:
+            self.failed_segments.extend(failed_items)
+        app_logger.debug(f"Added {len(failed_items)} items to failed list")
+    
+    def _flush_failed_segments(self):
+        """Append the failed segments collected in memory to the failed list file"""
+        with self.failed_lock:
+            pending_segments = self.failed_segments
+            self.failed_segments = []
+        
+        if not pending_segments:
+            return
+        
+        # The file may also hold items written by process_translation_results, so merge with it
+        with self.lock:
             try:
+                failed_segments = []
+                if os.path.exists(self.failed_json_path):
+                    with open(self.failed_json_path, "r", encoding="utf-8") as f:
+                        try:
+                            failed_segments = json.load(f)
+                        except json.JSONDecodeError:
+                            app_logger.warning("Failed segments file was corrupted, starting fresh")
+                
+                failed_segments.extend(pending_segments)
                 with open(self.failed_json_path, "w", encoding="utf-8") as f:
-                    json.dump([], f)
-                app_logger.debug(f"Created failed segments file")
-            except Exception as e:
-                app_logger.error(f"Error creating failed segments file: {e}")
-                return
-
-        # Now update the file with proper locking
-        try:
-            with open(self.failed_json_path, "r+", encoding="utf-8") as f:
-                try:
-                    failed_segments = json.load(f)
-                except json.JSONDecodeError:
-                    failed_segments = []
-                    app_logger.warning("Failed segments file was corrupted, starting fresh")
-
-                try:
-                    clean_segment = clean_json(segment)
-                    segment_dict = json.loads(clean_segment)
-                except json.JSONDecodeError as e:
-                    app_logger.error(f"Failed to decode JSON segment: {segment}. Error: {e}")
-                    return
-                    
-                for count, value in segment_dict.items():
-                    failed_segments.append({
-                        "count": int(count), 
-                        "value": value.strip()
-                    })
-                    
-                f.seek(0)
-                f.truncate()  # Clear the file before writing
-                json.dump(failed_segments, f, ensure_ascii=False, indent=4)
-                app_logger.debug(f"Successfully saved {len(segment_dict)} items to failed list")
+                    json.dump(failed_segments, f, ensure_ascii=False, indent=4)
+                app_logger.debug(f"Successfully saved {len(pending_segments)} items to failed list")
                 
-        except Exception as e:
-            app_logger.error(f"Error updating failed segments file: {e}")
+            except Exception as e:
+                app_logger.error(f"Error updating failed segments file: {e}")
     
     def process(self, file_name, file_extension, progress_callback=None):
         """Main processing method for document translation with deduplication"""
@@ -1,9 +1,13 @@
-from pipeline.word_translation_pipeline import extract_word_content_to_json, write_translated_content_to_word
+from pipeline.word_translation_pipeline import extract_word_content, save_word_content_json, write_translated_content_to_word
 from textProcessing.base_translator import DocumentTranslator
 
 class WordTranslator(DocumentTranslator):
+    # Extracted items kept in memory for the writer; stays None in continue mode, where src.json is read instead
+    content_data = None
+
     def extract_content_to_json(self,progress_callback=None):
-        return extract_word_content_to_json(self.input_file_path)
+        self.content_data, temp_folder = extract_word_content(self.input_file_path)
+        return save_word_content_json(self.content_data, temp_folder)
 
     def write_translated_json_to_file(self, json_path, translated_json_path,progress_callback=None):
-        write_translated_content_to_word(self.input_file_path, json_path, translated_json_path)
+        write_translated_content_to_word(self.input_file_path, json_path, translated_json_path, self.content_data)
@@ -16,7 +16,7 @@ from .ui_utils import (
 )
 from .translation_process import translate_files
 from config.languages_config import LABEL_TRANSLATIONS
-from llmWrapper.offline_translation import populate_sum_model
+from llmWrapper.offline_translation import invalidate_model_cache, populate_sum_model
 
 # Initialize UI state
 def init_ui(request: gr.Request):
@@ -44,7 +44,8 @@ def init_ui(request: gr.Request):
     use_online_value = default_online_state
     
     # Update model choices based on online/offline mode
-    # Load local and online models
+    # Load local and online models, probing the local services again on every page load
+    invalidate_model_cache()
     local_models = populate_sum_model() or []
     config_dir = "config/api_config"
     online_models = [
@@ -3,7 +3,7 @@ import os
 from typing import List, Tuple
 from config.log_config import app_logger
 from config.languages_config import LABEL_TRANSLATIONS, get_available_languages, add_custom_language
-from llmWrapper.offline_translation import populate_sum_model
+from llmWrapper.offline_translation import invalidate_model_cache, populate_sum_model
 
 def parse_accept_language(accept_language: str) -> List[Tuple[str, float]]:
     """Parse Accept-Language into (language, q) pairs."""
@@ -153,7 +153,8 @@ def update_model_list_and_api_input(use_online, config):
     # Get appropriate thread count based on the mode
     thread_count = config.get("default_thread_count_online", 2) if use_online else config.get("default_thread_count_offline", 4)
     
-    # Load models from configuration
+    # Load models from configuration, probing the local services again on every switch
+    invalidate_model_cache()
     local_models = populate_sum_model() or []
     
     config_dir = "config/api_config"